@@ -0,0 +1,80 @@
+# Element assignment phase of the Moodie Young Method, driven by a ready queue
+import heapq
+
+import numpy as np
+
+import profiling
+from line_assignment import LineAssignment
+
+
+def first_fit_station(stations, task, beat):
+    # lowest station at or after the stations of task's predecessors that still has room for task.
+    # The line always ends with an empty station, so a station is found as long as task.time <= beat
+    start = stations.lowest_station(task)
+    fitting = np.flatnonzero(stations.loads[start - 1:] + task.time <= beat)
+    profile = profiling.active
+    if profile is not None:
+        profile.count('order_checks')
+        profile.count('station_time_evaluations', len(stations) - start + 1)
+    return start + int(fitting[0])
+
+
+@profiling.timed('rpw_fill')
+def fill_stations(tasks, graph, beat, order):
+    # Station oriented fill of the RPW method: open a station, walk the unassigned tasks once in the given order
+    # (e.g. by decreasing rpw) and put every task that still fits and whose predecessors are all assigned at this
+    # station or before onto it, then open the next station. The tasks passed over are tried again on the next one
+    for task in tasks:
+        if task.time > beat:
+            raise ValueError("Task {} takes {} which exceeds the beat {}".format(task.id, task.time, beat))
+    profile = profiling.active
+    stations = LineAssignment(graph)
+    pending_tasks = list(order)
+    while pending_tasks:
+        stations.append_station()
+        j = len(stations)
+        passed_over = []
+        for object_task in pending_tasks:
+            fits = stations.station_time(j) + object_task.time <= beat
+            if profile is not None:
+                profile.count('station_time_evaluations')
+                profile.count('order_checks', fits)
+            if fits and stations.can_assign(object_task, j):
+                stations.add(j, object_task)
+            else:
+                passed_over.append(object_task)
+        pending_tasks = passed_over
+    return stations
+
+
+@profiling.timed('assignment')
+def assign_elements(tasks, graph, beat, keys, station_limit=None):
+    # Assign every task with Kahn's algorithm: a task becomes ready once all its predecessors are assigned, and the
+    # ready task with the smallest key (ties broken by file order) goes to its first fitting station.
+    # keys[i] is the priority key of tasks[i], e.g. -task.time for the classic "maximum task time first" rule.
+    # This picks the same task as sorting the ready tasks by key on every step, in O((n+e) log n) heap operations.
+    # With station_limit the assignment gives up and returns None as soon as a task needs a station beyond it
+    for task in tasks:
+        if task.time > beat:
+            raise ValueError("Task {} takes {} which exceeds the beat {}".format(task.id, task.time, beat))
+    stations = LineAssignment(graph)
+    stations.append_station()
+    in_degrees = graph.in_degrees().tolist()
+    ready = [(keys[i], i) for i in range(graph.n) if in_degrees[i] == 0]
+    heapq.heapify(ready)
+    while ready:
+        _, i = heapq.heappop(ready)
+        object_task = tasks[i]
+        j = first_fit_station(stations, object_task, beat)
+        if station_limit is not None and j > station_limit:
+            return None
+        stations.add(j, object_task)
+        if len(stations[-1]) >= 1:
+            stations.append_station()
+        for k in graph.successors[i]:
+            in_degrees[k] -= 1
+            if in_degrees[k] == 0:
+                heapq.heappush(ready, (keys[k], k))
+    if len(stations[-1]) == 0:
+        stations.pop_station()
+    return stations
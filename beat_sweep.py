@@ -0,0 +1,111 @@
+# Solve one instance for a whole range of cycle times (beats)
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lower_bounds import station_lower_bound
+from metrics import batch_metrics, stack_loads
+from mym_solver import MoodieYoungSolver
+from problem_instance import load_instance
+
+# solver of the worker process, set once per worker by the pool initializer
+_worker_solver = None
+
+
+def _init_worker(instance):
+    global _worker_solver
+    _worker_solver = MoodieYoungSolver(instance)
+
+
+def _solve_beat(solver, beat, rule, seed):
+    # one row of the sweep table with the station loads in place of the metrics, beats shorter than the longest
+    # task have no solution
+    if beat < solver.instance.graph.times.max():
+        return {'beat': beat, 'stations': None, 'lower_bound': None, 'loads': None}
+    solution = solver.solve(beat, rule, seed)
+    return {'beat': beat, 'stations': solution.station_count, 'lower_bound': station_lower_bound(solver.instance, beat),
+            'loads': solution.stations.loads.tolist()}
+
+
+def _solve_worker_beat(args):
+    return _solve_beat(_worker_solver, *args)
+
+
+def beat_range(start, stop, step=1):
+    # the beats start..stop, stop included, counting down for a negative step
+    if step == 0:
+        raise ValueError("The beat step must not be 0")
+    return list(range(start, stop + (1 if step > 0 else -1), step))
+
+
+def sweep_beats(instance, beats, rule='max_time', seed=None, workers=None):
+    # Solve instance for every beat in beats and return one row per beat, in the given order.
+    # The closure and the positional weights are computed here, before the workers start, so each worker receives
+    # them with the instance instead of computing them again. Workers return the station loads, the balance rate
+    # and SI of all lines are then computed together by batch_metrics
+    instance.weights
+    workers = workers or os.cpu_count() or 1
+    jobs = [(beat, rule, seed) for beat in beats]
+    if workers == 1 or len(jobs) == 1:
+        solver = MoodieYoungSolver(instance)
+        rows = [_solve_beat(solver, *job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(instance,)) as executor:
+            rows = list(executor.map(_solve_worker_beat, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    lines = [row.pop('loads') for row in rows]
+    solved = [k for k, loads in enumerate(lines) if loads is not None]
+    metrics = batch_metrics(*stack_loads([lines[k] for k in solved]))
+    for row in rows:
+        row['balance_rate'] = row['smoothing_index'] = None
+    for k, balance_rate, smoothing_index in zip(solved, metrics.balance_rate.tolist(),
+                                                metrics.smoothing_index.tolist()):
+        rows[k]['balance_rate'] = balance_rate
+        rows[k]['smoothing_index'] = smoothing_index
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Station count, balance rate and SI for a range of beats")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    beats = parser.add_mutually_exclusive_group(required=True)
+    beats.add_argument('--beats', type=int, nargs='+', help="list of beats")
+    beats.add_argument('--range', type=int, nargs='+', metavar=('START', 'STOP'),
+                       help="beats START..STOP inclusive, with an optional STEP (negative to count down)")
+    parser.add_argument('--rule', default='max_time', help="MYM priority rule")
+    parser.add_argument('--seed', type=int, help="seed of the random rule")
+    parser.add_argument('--workers', type=int, help="worker processes, all cores by default")
+    parser.add_argument('--output', help="also write the table to this CSV file")
+    args = parser.parse_args()
+
+    if args.range:
+        if len(args.range) not in (2, 3):
+            parser.error("--range takes START STOP and an optional STEP")
+        try:
+            beat_list = beat_range(*args.range)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        beat_list = args.beats
+    rows = sweep_beats(load_instance(args.csv_file, cache=args.cache), beat_list, args.rule, args.seed, args.workers)
+
+    print("{:>8}{:>10}{:>8}{:>14}{:>14}".format("beat", "stations", "LB", "eta", "SI"))
+    for row in rows:
+        if row['stations'] is None:
+            print("{:>8}{:>10}".format(row['beat'], "-"))
+        else:
+            print("{:>8}{:>10}{:>8}{:>14.4f}{:>14.4f}".format(row['beat'], row['stations'], row['lower_bound'],
+                                                               row['balance_rate'], row['smoothing_index']))
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=['beat', 'stations', 'lower_bound', 'balance_rate',
+                                                      'smoothing_index'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
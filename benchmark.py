@@ -0,0 +1,203 @@
+# Phase by phase benchmark of the RPW / MYM pipeline on generated instances, with a JSON history
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from assignment_engine import assign_elements, fill_stations
+from instance_generator import generate_tasks, write_tasks_csv
+from metrics import calculate_balance_rate, calculate_smoothing_index
+from positional_weights import compute_positional_weights
+from precedence_graph import build_graph
+from problem_instance import find_chain_successors, find_successors, read_tasks_from_csv, write_rpw
+from trade_transfer import trade_and_transfer
+from transitive_closure import TransitiveClosure
+
+PHASES = ('csv_load', 'find_successors', 'find_chain_successors', 'write_rpw', 'rpw_fill', 'mym_assignment',
+          'trade_transfer', 'metrics')
+DEFAULT_HISTORY = 'benchmark_history.json'
+
+
+def run_phases(csv_file, beat, clock):
+    # Run the whole pipeline once on csv_file. clock(phase) is entered around every phase, in PHASES order.
+    # find_successors includes building the graph, find_chain_successors the closure and write_rpw the weights
+    with clock('csv_load'):
+        tasks = read_tasks_from_csv(csv_file)
+    with clock('find_successors'):
+        graph = build_graph(tasks)
+        find_successors(tasks, graph)
+    with clock('find_chain_successors'):
+        closure = TransitiveClosure(graph)
+        find_chain_successors(tasks, closure)
+    with clock('write_rpw'):
+        write_rpw(tasks, compute_positional_weights(closure))
+    with clock('rpw_fill'):
+        fill_stations(tasks, graph, beat, sorted(tasks, key=lambda task: task.rpw, reverse=True))
+    with clock('mym_assignment'):
+        stations = assign_elements(tasks, graph, beat, [-task.time for task in tasks])
+    with clock('trade_transfer'):
+        trade_and_transfer(stations)
+    with clock('metrics'):
+        calculate_balance_rate(stations)
+        calculate_smoothing_index(stations)
+
+
+class _Timer:
+    # clock of run_phases that keeps the wall time of every phase
+    def __init__(self):
+        self.seconds = {}
+        self.phase = None
+
+    def __call__(self, phase):
+        self.phase = phase
+        return self
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.seconds[self.phase] = time.perf_counter() - self.start
+
+
+class _PeakMemory:
+    # clock of run_phases that keeps the peak of traced allocations during every phase
+    def __init__(self):
+        self.peak = {}
+        self.phase = None
+
+    def __call__(self, phase):
+        self.phase = phase
+        return self
+
+    def __enter__(self):
+        tracemalloc.reset_peak()
+        self.start = tracemalloc.get_traced_memory()[0]
+
+    def __exit__(self, *exc_info):
+        self.peak[self.phase] = tracemalloc.get_traced_memory()[1] - self.start
+
+
+def benchmark_size(csv_file, beat, repeats):
+    # best wall time of repeats runs per phase, then one traced run for the peak memory of each phase
+    # (tracing slows Python down, so it is kept out of the timed runs)
+    best = {}
+    for _ in range(repeats):
+        timer = _Timer()
+        run_phases(csv_file, beat, timer)
+        for phase, seconds in timer.seconds.items():
+            best[phase] = min(best.get(phase, seconds), seconds)
+    memory = _PeakMemory()
+    tracemalloc.start()
+    try:
+        run_phases(csv_file, beat, memory)
+    finally:
+        tracemalloc.stop()
+    return {phase: {'seconds': best[phase], 'peak_bytes': memory.peak[phase]} for phase in PHASES}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sizes, beat=100, repeats=3, order_strength=0.2, seed=0, label=None):
+    # one history record: the phases of every size, on instances generated from seed into a temporary directory
+    record = {'label': label, 'commit': _git_commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'python': platform.python_version(), 'machine': platform.machine(), 'beat': beat,
+              'order_strength': order_strength, 'seed': seed, 'sizes': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            csv_file = os.path.join(directory, 'tasks_{}.csv'.format(size))
+            write_tasks_csv(generate_tasks(size, order_strength, seed=seed), csv_file)
+            record['sizes'][str(size)] = benchmark_size(csv_file, beat, repeats)
+    return record
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def append_history(path, record):
+    history = load_history(path)
+    history.append(record)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(history, file, indent=1)
+
+
+def compare_records(baseline, current, threshold, min_seconds=0.001):
+    # (size, phase, baseline seconds, current seconds, change) of every phase in both records, change as a
+    # fraction, and the rows that got slower by more than threshold (also a fraction). Slowdowns of less than
+    # min_seconds are timer noise and never count as a regression
+    rows = []
+    for size, phases in current['sizes'].items():
+        for phase, figures in phases.items():
+            before = baseline['sizes'].get(size, {}).get(phase)
+            if before is None:
+                continue
+            change = figures['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+            rows.append((size, phase, before['seconds'], figures['seconds'], change))
+    return rows, [row for row in rows if row[4] > threshold and row[3] - row[2] > min_seconds]
+
+
+def _print_record(record):
+    print("{:>8}  {:<22}{:>12}{:>14}".format("tasks", "phase", "seconds", "peak KiB"))
+    for size, phases in record['sizes'].items():
+        for phase in PHASES:
+            figures = phases[phase]
+            print("{:>8}  {:<22}{:>12.5f}{:>14.1f}".format(size, phase, figures['seconds'],
+                                                         figures['peak_bytes'] / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase level benchmark with a JSON history")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="benchmark generated instances and append the result to the history")
+    run.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help="task counts")
+    run.add_argument('--beat', type=int, default=100)
+    run.add_argument('--repeats', type=int, default=3, help="timed runs per size, the fastest one is kept")
+    run.add_argument('--order-strength', type=float, default=0.2)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--label', help="name of the record, e.g. the change being measured")
+    run.add_argument('--history', default=DEFAULT_HISTORY)
+    compare = commands.add_parser('compare', help="compare two records of the history")
+    compare.add_argument('--history', default=DEFAULT_HISTORY)
+    compare.add_argument('--baseline', type=int, default=-2, help="index of the baseline record")
+    compare.add_argument('--current', type=int, default=-1, help="index of the compared record")
+    compare.add_argument('--threshold', type=float, default=10.0, help="allowed slowdown in percent")
+    compare.add_argument('--min-seconds', type=float, default=0.001, help="slowdowns below this are ignored")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        record = run_benchmark(args.sizes, args.beat, args.repeats, args.order_strength, args.seed, args.label)
+        append_history(args.history, record)
+        _print_record(record)
+        return
+
+    history = load_history(args.history)
+    if len(history) < 2:
+        sys.exit("The history {} needs at least two records to compare".format(args.history))
+    baseline, current = history[args.baseline], history[args.current]
+    rows, regressions = compare_records(baseline, current, args.threshold / 100, args.min_seconds)
+    print("Baseline", baseline.get('label') or baseline['time'], "against", current.get('label') or current['time'])
+    print("{:>8}  {:<22}{:>12}{:>12}{:>10}".format("tasks", "phase", "baseline", "current", "change"))
+    for row in rows:
+        size, phase, before, after, change = row
+        flag = "  REGRESSION" if row in regressions else ""
+        print("{:>8}  {:<22}{:>12.5f}{:>12.5f}{:>9.1f}%{}".format(size, phase, before, after, 100 * change, flag))
+    if regressions:
+        sys.exit("{} phases slower than the baseline by more than {}%".format(len(regressions), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
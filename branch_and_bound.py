@@ -0,0 +1,181 @@
+# Exact station-oriented branch and bound for SALBP-1 (fewest stations for a given beat)
+import argparse
+import time
+
+from line_assignment import LineAssignment
+from lower_bounds import station_lower_bound
+from mym_solver import MoodieYoungSolver
+from problem_instance import load_instance
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class BranchAndBoundResult:
+    def __init__(self, stations, lower_bound, optimal, nodes, elapsed):
+        # stations is the best LineAssignment found, lower_bound the best proven bound on the station count
+        self.stations = stations
+        self.lower_bound = lower_bound
+        self.optimal = optimal
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    @property
+    def station_count(self):
+        return len(self.stations)
+
+    @property
+    def gap(self):
+        # stations above the proven lower bound, 0 when the solution is optimal
+        return self.station_count - self.lower_bound
+
+
+class BranchAndBoundSolver:
+    # Stations are filled one after the other. At each node the next station receives one of the maximal loads
+    # that can be built from the tasks whose predecessors are all assigned: a load is maximal when no further
+    # available task fits in the remaining time (Jackson's dominance rule, a non maximal load is never needed).
+    # Nodes are pruned by the lower bound of the remaining tasks and by memoization of the assigned task bitset:
+    # reaching the same set of assigned tasks again with no fewer stations cannot lead to anything better
+    def __init__(self, instance, beat, node_limit=None, time_limit=None):
+        self.instance = instance
+        self.beat = beat
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        graph = instance.graph
+        self.times = graph.times.tolist()
+        self.predecessor_masks = [sum(1 << k for k in predecessors) for predecessors in graph.predecessors]
+        self.full = (1 << graph.n) - 1
+        self.half_masks = self._mask(lambda time: 2 * time > beat), self._mask(lambda time: 2 * time == beat)
+
+    def _mask(self, condition):
+        return sum(1 << i for i, time in enumerate(self.times) if condition(time))
+
+    def _remaining_bound(self, assigned):
+        # stations still needed by the unassigned tasks: total time and the beat / 2 bound
+        remaining = self.full & ~assigned
+        remaining_time = sum(self.times[i] for i in _bits(remaining))
+        over_half = (remaining & self.half_masks[0]).bit_count()
+        exactly_half = (remaining & self.half_masks[1]).bit_count()
+        return max(-(-remaining_time // self.beat), over_half + -(-exactly_half // 2))
+
+    def _is_ready(self, i, done):
+        mask = self.predecessor_masks[i]
+        return done & mask == mask
+
+    def _maximal_loads(self, assigned):
+        # every maximal load of the next station as (load bitset, load time, task indices), the fullest first
+        graph = self.instance.graph
+        loads = {}
+        seen = set()
+        ready = [i for i in _bits(self.full & ~assigned) if self._is_ready(i, assigned)]
+
+        def extend(load, load_time, members, candidates):
+            self._count_node()
+            extended = False
+            for position, i in enumerate(candidates):
+                if load_time + self.times[i] > self.beat:
+                    continue
+                extended = True
+                new_load = load | (1 << i)
+                if new_load in seen:
+                    continue
+                seen.add(new_load)
+                done = assigned | new_load
+                new_candidates = candidates[:position] + candidates[position + 1:]
+                new_candidates += [k for k in graph.successors[i] if self._is_ready(k, done)]
+                extend(new_load, load_time + self.times[i], members + [i], new_candidates)
+            if not extended and load:
+                loads[load] = (load_time, members)
+
+        extend(0, 0, [], ready)
+        return sorted(((load, load_time, members) for load, (load_time, members) in loads.items()),
+                      key=lambda item: -item[1])
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise BudgetExhausted()
+        if self.time_limit is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise BudgetExhausted()
+
+    def _branch(self, assigned, stations):
+        if assigned == self.full:
+            if len(stations) < len(self.best):
+                self.best = [list(station) for station in stations]
+            return
+        if len(stations) + self._remaining_bound(assigned) >= len(self.best):
+            return
+        if self.memo.get(assigned, len(self.best)) <= len(stations):
+            return
+        self.memo[assigned] = len(stations)
+        for load, _, members in self._maximal_loads(assigned):
+            stations.append(members)
+            self._branch(assigned | load, stations)
+            stations.pop()
+            if len(self.best) <= self.lower_bound:
+                return
+
+    def solve(self, initial=None):
+        # initial is an optional LineAssignment used as the first incumbent, by default the best of the
+        # max_time and rpw MYM assignments
+        start = time.perf_counter()
+        self.deadline = start + (self.time_limit or 0)
+        self.nodes = 0
+        self.memo = {}
+        self.lower_bound = station_lower_bound(self.instance, self.beat)
+        index = self.instance.graph.index
+        if initial is None:
+            solver = MoodieYoungSolver(self.instance)
+            initial = min((solver.solve(self.beat, rule, trade=False).stations for rule in ('max_time', 'rpw')),
+                          key=len)
+        self.best = [[index[task.id] for task in station] for station in initial]
+
+        optimal = True
+        if len(self.best) > self.lower_bound:
+            try:
+                self._branch(0, [])
+            except BudgetExhausted:
+                optimal = False
+        lower_bound = len(self.best) if optimal else self.lower_bound
+        stations = LineAssignment(self.instance.graph)
+        for station in self.best:
+            stations.append_station()
+            for i in station:
+                stations.add(len(stations), self.instance.tasks[i])
+        return BranchAndBoundResult(stations, lower_bound, optimal, self.nodes, time.perf_counter() - start)
+
+
+def _bits(mask):
+    # indices of the set bits of mask, ascending
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def solve_exact(instance, beat, node_limit=None, time_limit=None, initial=None):
+    return BranchAndBoundSolver(instance, beat, node_limit, time_limit).solve(initial)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact SALBP-1 branch and bound")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--beat', type=int, default=54)
+    parser.add_argument('--node-limit', type=int)
+    parser.add_argument('--time-limit', type=float, help="seconds")
+    args = parser.parse_args()
+
+    result = solve_exact(load_instance(args.csv_file, cache=args.cache), args.beat, args.node_limit, args.time_limit)
+    print("The number of stations is", result.station_count,
+          "(optimal)" if result.optimal else "(lower bound {}, gap {})".format(result.lower_bound, result.gap))
+    for index, station in enumerate(result.stations):
+        print("Station", index + 1, "operates Task", [task.id for task in station])
+    print("The time of each station is", result.stations.loads.tolist())
+    print("Nodes", result.nodes, "in", round(result.elapsed, 3), "s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# Random key genetic algorithm over task priority vectors, decoded a whole population at a time
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import profiling
+from assignment_engine import assign_elements
+from metrics import batch_metrics, calculate_balance_rate, calculate_smoothing_index
+from mym_solver import PRIORITY_RULES
+from problem_instance import load_instance
+from trade_transfer import trade_and_transfer
+
+# populations of at least this size are decoded on a process pool unless the number of workers is given
+POOL_POPULATION = 512
+
+
+def _padded(adjacency, sentinel):
+    # adjacency lists as one rectangular index table, short rows filled with sentinel
+    width = max([len(neighbours) for neighbours in adjacency] + [1])
+    table = np.full((len(adjacency), width), sentinel, dtype=np.int64)
+    for i, neighbours in enumerate(adjacency):
+        table[i, :len(neighbours)] = neighbours
+    return table
+
+
+class BatchDecoder:
+    # Decodes many priority vectors at once with the rule of assign_elements: the ready task with the smallest key
+    # (ties to the lower task index) goes to the first station at or after its predecessors that still has room.
+    # All individuals advance in lockstep, one task per step, on (population x task) and (population x station)
+    # arrays, so the n steps of a generation cost n array operations instead of n Python steps per individual.
+    # Column n of the task arrays is a sentinel that pads the predecessor and successor tables
+    def __init__(self, instance, beat):
+        graph = instance.graph
+        for task in instance.tasks:
+            if task.time > beat:
+                raise ValueError("Task {} takes {} which exceeds the beat {}".format(task.id, task.time, beat))
+        self.beat = beat
+        self.n = graph.n
+        self.times = np.append(graph.times, 0)
+        self.in_degrees = np.append(graph.in_degrees(), 0)
+        self.predecessor_table = _padded(graph.predecessors, graph.n)
+        self.successor_table = _padded(graph.successors, graph.n)
+
+    def decode(self, keys):
+        # station of every task (population x n) and station loads (population x n) of every row of keys
+        keys = np.asarray(keys, dtype=np.float64)
+        size, n = len(keys), self.n
+        rows = np.arange(size)
+        columns = rows[:, None]
+        padded_keys = np.full((size, n + 1), np.inf)
+        padded_keys[:, :n] = keys
+        in_degrees = np.tile(self.in_degrees, (size, 1))
+        ready_keys = np.where(in_degrees == 0, padded_keys, np.inf)
+        station_of = np.zeros((size, n + 1), dtype=np.int64)
+        loads = np.zeros((size, n + 1), dtype=np.int64)
+        used = 1
+        for _ in range(n):
+            i = ready_keys.argmin(axis=1)
+            ready_keys[rows, i] = np.inf
+            start = np.maximum(station_of[columns, self.predecessor_table[i]].max(axis=1), 1)
+            time_i = self.times[i]
+            # the stations in use plus one empty station, which always fits
+            station_numbers = np.arange(1, used + 2)
+            fits = (loads[:, :used + 1] + time_i[:, None] <= self.beat) & (station_numbers >= start[:, None])
+            j = fits.argmax(axis=1) + 1
+            loads[rows, j - 1] += time_i
+            station_of[rows, i] = j
+            used = max(used, int(j.max()))
+            successors = self.successor_table[i]
+            in_degrees[columns, successors] -= 1
+            newly_ready = in_degrees[columns, successors] == 0
+            ready_keys[columns, successors] = np.where(newly_ready, padded_keys[columns, successors],
+                                                       ready_keys[columns, successors])
+        return station_of[:, :n], loads[:, :used]
+
+    def evaluate(self, keys):
+        # station count and smoothing index of every row of keys
+        station_of, loads = self.decode(keys)
+        station_counts = station_of.max(axis=1)
+        return station_counts, batch_metrics(loads, station_counts).smoothing_index
+
+
+# decoder of the worker process, set once per worker by the pool initializer
+_worker_decoder = None
+
+
+def _init_worker(instance, beat):
+    global _worker_decoder
+    _worker_decoder = BatchDecoder(instance, beat)
+
+
+def _evaluate_worker_chunk(keys):
+    return _worker_decoder.evaluate(keys)
+
+
+def rule_keys(instance, rule, rng):
+    # the keys of a MYM priority rule as ranks in [0, 1), ties kept in task order, so they decode to the same line
+    keys = np.asarray(PRIORITY_RULES[rule](instance, rng), dtype=np.float64)
+    ranks = np.empty(len(keys))
+    ranks[np.argsort(keys, kind='stable')] = np.arange(len(keys))
+    return ranks / len(keys)
+
+
+class GeneticResult:
+    def __init__(self, stations, keys, generations, evaluations, history, elapsed):
+        # stations is the line of the best priority vector keys, history the best (stations, SI) per generation
+        self.stations = stations
+        self.keys = keys
+        self.generations = generations
+        self.evaluations = evaluations
+        self.history = history
+        self.elapsed = elapsed
+
+    @property
+    def station_count(self):
+        return len(self.stations)
+
+    @property
+    def balance_rate(self):
+        return float(calculate_balance_rate(self.stations))
+
+    @property
+    def smoothing_index(self):
+        return float(calculate_smoothing_index(self.stations))
+
+
+class GeneticAlgorithm:
+    # Biased random key GA: an individual is one key per task, decoded by BatchDecoder. Each generation keeps the
+    # elite unchanged, adds fresh random individuals (mutants) and fills the rest with children of an elite and a
+    # non elite parent that take each key from the elite parent with probability elite_bias. Fitness is the
+    # station count, then the smoothing index. The first population holds the keys of every MYM priority rule
+    def __init__(self, instance, beat, population=100, elite=0.2, mutants=0.1, elite_bias=0.7, workers=None):
+        self.instance = instance
+        self.beat = beat
+        self.population = population
+        self.elite_count = max(1, int(elite * population))
+        self.mutant_count = int(mutants * population)
+        self.elite_bias = elite_bias
+        if workers is None:
+            workers = (os.cpu_count() or 1) if population >= POOL_POPULATION else 1
+        self.workers = workers
+        self.decoder = BatchDecoder(instance, beat)
+
+    def _fitness(self, keys, executor):
+        # station count + SI scaled below one station (SI never exceeds beat * stations <= beat * n)
+        if executor is None:
+            station_counts, smoothing = self.decoder.evaluate(keys)
+        else:
+            chunks = np.array_split(keys, self.workers)
+            results = list(executor.map(_evaluate_worker_chunk, chunks))
+            station_counts = np.concatenate([result[0] for result in results])
+            smoothing = np.concatenate([result[1] for result in results])
+        return station_counts + smoothing / (self.beat * self.decoder.n + 1), station_counts, smoothing
+
+    def _next_generation(self, keys, order, rng):
+        n = self.decoder.n
+        elite = keys[order[:self.elite_count]]
+        others = keys[order[self.elite_count:]]
+        child_count = self.population - self.elite_count - self.mutant_count
+        elite_parents = elite[rng.integers(len(elite), size=child_count)]
+        other_parents = others[rng.integers(len(others), size=child_count)] if len(others) else elite_parents
+        children = np.where(rng.random((child_count, n)) < self.elite_bias, elite_parents, other_parents)
+        return np.concatenate([elite, children, rng.random((self.mutant_count, n))])
+
+    @profiling.timed('genetic')
+    def run(self, generations=None, time_limit=None, seed=None, trade=True):
+        # Evolve for generations or time_limit seconds (at least one must be given) and return the best line,
+        # after trade and transfer unless trade is False
+        if generations is None and time_limit is None:
+            raise ValueError("The GA needs generations or a time limit")
+        start_time = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        rule_rng = random.Random(seed)
+        seeded = [rule_keys(self.instance, rule, rule_rng) for rule in PRIORITY_RULES][:self.population]
+        keys = np.concatenate([np.array(seeded), rng.random((self.population - len(seeded), self.decoder.n))])
+
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.instance, self.beat))
+        history = []
+        generation = evaluations = 0
+        try:
+            while True:
+                fitness, station_counts, smoothing = self._fitness(keys, executor)
+                evaluations += len(keys)
+                order = np.argsort(fitness, kind='stable')
+                history.append((int(station_counts[order[0]]), float(smoothing[order[0]])))
+                generation += 1
+                if generations is not None and generation >= generations:
+                    break
+                if time_limit is not None and time.perf_counter() - start_time >= time_limit:
+                    break
+                keys = self._next_generation(keys, order, rng)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best_keys = keys[order[0]]
+        stations = assign_elements(self.instance.tasks, self.instance.graph, self.beat, best_keys.tolist())
+        if trade:
+            trade_and_transfer(stations)
+        if profiling.active is not None:
+            profiling.active.count('genetic_evaluations', evaluations)
+        return GeneticResult(stations, best_keys, generation, evaluations, history, time.perf_counter() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genetic algorithm over task priority vectors")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--beat', type=int, default=54)
+    parser.add_argument('--population', type=int, default=100)
+    parser.add_argument('--generations', type=int)
+    parser.add_argument('--time-limit', type=float, help="seconds, 10 when no generation count is given")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int, help="worker processes, all cores for large populations by default")
+    args = parser.parse_args()
+
+    time_limit = args.time_limit if args.time_limit is not None or args.generations is not None else 10
+    ga = GeneticAlgorithm(load_instance(args.csv_file, cache=args.cache), args.beat, args.population,
+                          workers=args.workers)
+    result = ga.run(args.generations, time_limit, args.seed)
+    print("Best of", result.evaluations, "priority vectors in", result.generations, "generations")
+    print("The number of stations is", result.station_count)
+    for index, station in enumerate(result.stations):
+        print("Station", index + 1, "operates Task", [task.id for task in station])
+    print("The time of each station is", result.stations.loads.tolist())
+    print("Balance Rate eta =", result.balance_rate)
+    print("Smoothing Index SI =", result.smoothing_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Compiled problem instances on disk: the parsed task table as CSR arrays in one .npz file
+import hashlib
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+# bumped whenever the content of the compiled file changes, older files are then rebuilt
+FORMAT_VERSION = 2
+COMPILED_SUFFIX = '.compiled.npz'
+
+
+def file_digest(path):
+    # SHA-256 of the content of path, read in blocks
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compiled_path(csv_file):
+    return csv_file + COMPILED_SUFFIX
+
+
+def pack_blobs(blobs):
+    # byte strings back to back as (uint8 data, int64 offsets), blob r is data[offsets[r]:offsets[r + 1]]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8), offsets
+
+
+def unpack_blobs(data, offsets):
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[r]:bounds[r + 1]] for r in range(len(bounds) - 1)]
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_compiled(path, digest, instance):
+    # Compile the tasks of instance into path, tagged with digest of its source file: ids, times, names and the
+    # predecessor CSR arrays, nothing derived from them. Closure and weights stay lazy on the loaded instance.
+    # The file is written to a temporary file of its own next to the final name and then moved over it, so
+    # neither a reader nor a concurrent writer ever sees half a file. mkstemp creates it for the owner only, it
+    # gets the mode of any other new file before the move. A directory that cannot be written to only means
+    # there is no cache, the error is not raised
+    graph = instance.graph
+    name_data, name_offsets = pack_blobs([task.name.encode('utf-8') for task in instance.tasks])
+    temporary = None
+    try:
+        handle, temporary = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(path) + '.',
+                                             dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(handle, 'wb') as file:
+            np.savez(file, version=np.int64(FORMAT_VERSION), digest=np.str_(digest),
+                     ids=np.array(graph.ids, dtype=np.int64), times=graph.times,
+                     name_data=name_data, name_offsets=name_offsets,
+                     pred_indptr=graph.pred_indptr, pred_indices=graph.pred_indices)
+        os.chmod(temporary, 0o666 & ~_umask())
+        os.replace(temporary, path)
+    except OSError:
+        if temporary is not None and os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_compiled(path, digest):
+    # the arrays of the compiled file at path as a dict, None when it is missing, unreadable (empty, truncated or
+    # otherwise corrupt), of another format version or compiled from a source with another digest
+    try:
+        with np.load(path) as compiled:
+            if int(compiled['version']) != FORMAT_VERSION or str(compiled['digest']) != digest:
+                return None
+            arrays = {key: compiled[key] for key in compiled.files}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return None
+    arrays['names'] = [blob.decode('utf-8')
+                       for blob in unpack_blobs(arrays.pop('name_data'), arrays.pop('name_offsets'))]
+    return arrays
@@ -0,0 +1,291 @@
+# Reproducible synthetic SALBP instances for scale testing
+import argparse
+import csv
+import math
+import os
+import warnings
+
+import numpy as np
+
+from instance_cache import compiled_path, file_digest, write_compiled
+from problem_instance import ProblemInstance, Task
+
+TIME_DISTRIBUTIONS = ('uniform', 'normal', 'lognormal', 'bimodal')
+
+# with a chain depth the order strength is fitted to within this, in at most FIT_ROUNDS more measured generations
+ORDER_STRENGTH_TOLERANCE = 0.01
+FIT_ROUNDS = 12
+# bisection steps for the depth that predicts the order strength without a chain depth
+DEPTH_ROUNDS = 40
+
+
+def task_times(rng, count, distribution='uniform', low=1, high=50):
+    # count integer task times in low..high drawn from one of TIME_DISTRIBUTIONS
+    if distribution == 'uniform':
+        values = rng.integers(low, high + 1, size=count)
+    elif distribution == 'normal':
+        values = rng.normal((low + high) / 2, (high - low) / 6, size=count)
+    elif distribution == 'lognormal':
+        # most tasks short, a long tail of long ones
+        values = low + (high - low) * rng.lognormal(0, 0.75, size=count) / np.exp(2.25)
+    elif distribution == 'bimodal':
+        centres = np.where(rng.random(count) < 0.5, low + (high - low) / 4, low + 3 * (high - low) / 4)
+        values = rng.normal(centres, (high - low) / 12)
+    else:
+        raise ValueError("Unknown time distribution {}, expected one of {}".format(distribution, TIME_DISTRIBUTIONS))
+    return np.clip(np.rint(values), low, high).astype(np.int64)
+
+
+def _near(rng, position, level_start, level_width, levels, locality):
+    # a task of each of levels near the relative positions position (in [0, 1)), at most locality / 2 of the
+    # level width away on either side, wrapping around at the ends of the level
+    x = (position + locality * (rng.random(len(levels)) - 0.5)) % 1.0
+    return level_start[levels] + np.minimum((x * level_width[levels]).astype(np.int64), level_width[levels] - 1)
+
+
+def _layered_predecessors(rng, task_count, depth, mean_predecessors, span, locality, diamonds):
+    # Predecessor lists of one connected layered graph of task_count tasks over depth levels of task_count / depth
+    # tasks, task i in level floor(i * depth / task_count) (a fractional depth makes the last level narrower).
+    # Every task after the first level gets one predecessor in the level before, so the longest chain has
+    # ceil(depth) tasks, and on average mean_predecessors - 1 more from the span levels before it; every task
+    # before the last level gets a successor in the level after. Predecessors are drawn near the relative position
+    # of the task in its level (_near): with locality 1 from anywhere in the level, with a smaller locality the
+    # edges stay in a band and reach fewer tasks per level. diamonds diamonds a -> b, c -> d are added across
+    # three consecutive levels
+    levels = (np.arange(task_count) * depth // task_count).astype(np.int64)
+    depth = int(levels[-1]) + 1
+    level_start = np.searchsorted(levels, np.arange(depth + 1))
+    level_width = np.diff(level_start)
+    position = (np.arange(task_count) - level_start[levels] + 0.5) / level_width[levels]
+
+    tasks = np.arange(level_start[1] if depth > 1 else task_count, task_count)
+    chained = _near(rng, position[tasks], level_start, level_width, levels[tasks] - 1, locality)
+    owners = np.repeat(tasks, rng.poisson(max(mean_predecessors - 1, 0), size=len(tasks)))
+    drawn = rng.integers(level_start[np.maximum(levels[owners] - span, 0)], level_start[levels[owners]])
+    extra = _near(rng, position[owners], level_start, level_width, levels[drawn], locality)
+    # every task of a level that no task of the next level chained to needs a successor there, or it would end a
+    # chain early
+    ends = np.setdiff1d(np.arange(level_start[depth - 1]), chained)
+    successors = _near(rng, position[ends], level_start, level_width, levels[ends] + 1, locality)
+
+    edges = np.unique(np.concatenate([tasks, owners, successors]) * task_count
+                      + np.concatenate([chained, extra, ends]))
+    targets, sources = np.divmod(edges, task_count)
+    indptr = np.searchsorted(targets, np.arange(task_count + 1)).tolist()
+    sources = sources.tolist()
+    predecessors = [sources[indptr[i]:indptr[i + 1]] for i in range(task_count)]
+    _connect(predecessors, level_start.tolist())
+
+    wide = [level for level in range(1, depth - 1) if level_width[level] >= 2]
+    for _ in range(diamonds if wide else 0):
+        level = wide[rng.integers(len(wide))]
+        a = int(rng.integers(level_start[level - 1], level_start[level]))
+        b, c = (int(k) for k in rng.choice(np.arange(level_start[level], level_start[level + 1]), 2, replace=False))
+        d = int(rng.integers(level_start[level + 1], level_start[level + 2]))
+        for successor, predecessor in ((b, a), (c, a), (d, b), (d, c)):
+            if predecessor not in predecessors[successor]:
+                predecessors[successor].append(predecessor)
+                predecessors[successor].sort()
+    return predecessors
+
+
+def _connect(predecessors, level_start):
+    # Join the weakly connected components of a layered graph into one: neighbouring tasks of a level that lie in
+    # different components get an edge from a predecessor of the first to the second. Then every level is in one
+    # component, and the chained predecessors join the levels
+    parent = list(range(len(predecessors)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, task_predecessors in enumerate(predecessors):
+        for k in task_predecessors:
+            parent[find(k)] = find(i)
+    for level in range(1, len(level_start) - 1):
+        for i in range(level_start[level], level_start[level + 1] - 1):
+            root, next_root = find(i), find(i + 1)
+            if root != next_root:
+                predecessors[i + 1] = sorted({predecessors[i][0], *predecessors[i + 1]})
+                parent[next_root] = root
+
+
+def predicted_order_strength(task_count, depth, mean_predecessors=2.0, span=2, diamond_share=0.0):
+    # Order strength of _layered_predecessors with locality 1, estimated level by level: a task k levels after a
+    # task t is after t when one of its predecessors is, reached[k] is that share of its level. Within a few
+    # hundredths of the measured one from 100 tasks on, closer with more tasks and more mean predecessors
+    if depth <= 1 or task_count <= 1:
+        return 0.0
+    width = task_count / depth
+    levels = int((task_count - 1) * depth / task_count) + 1
+    last = task_count - (levels - 1) * width
+    # edges from the level before per task besides the chained one: to the ends of chains, and of the diamonds
+    ends = (math.exp(-1) if width > 1 else 0.0) + 4 * diamond_share
+    reached = [1 / width]
+    ordered = 0.0
+    for k in range(1, levels):
+        window = sum(reached[max(k - span, 0):k]) / span
+        reached.append(1 - (1 - reached[k - 1]) * math.exp(-max(mean_predecessors - 1, 0) * window
+                                                            - ends * reached[k - 1]))
+        if reached[k] > 1 - 1e-12:
+            # every later level is reached in full
+            ordered += width * width * (levels - 1 - k) * (levels - k) / 2 + width * last * (levels - k)
+            break
+        # levels - 1 - k pairs of full levels k apart, and the level k before the last one with the last one
+        ordered += (width * width * (levels - 1 - k) + width * last) * reached[k]
+    return min(1.0, ordered / (task_count * (task_count - 1) / 2))
+
+
+def _depth_for(task_count, order_strength, mean_predecessors, span, diamond_share):
+    # the depth in 1..task_count whose predicted_order_strength is order_strength, by bisection (it grows with the
+    # depth)
+    low, high = 1.0, float(task_count)
+    for _ in range(DEPTH_ROUNDS):
+        depth = (low + high) / 2
+        if predicted_order_strength(task_count, depth, mean_predecessors, span, diamond_share) < order_strength:
+            low = depth
+        else:
+            high = depth
+    return high
+
+
+def generate_tasks(task_count, order_strength=0.5, chain_depth=None, mean_predecessors=2.0, span=2,
+                   diamond_share=0.0, time_distribution='uniform', time_range=(1, 50), shuffle=False, seed=None):
+    # Tasks of one connected layered precedence graph (see _layered_predecessors). Pairs of tasks in one level are
+    # never ordered, pairs of levels far enough apart nearly always are, so the order strength grows with the
+    # depth. Without chain_depth the depth is the one whose predicted_order_strength is closest to
+    # order_strength, in O(task_count + edges). A chain_depth fixes the levels, the locality of the edges is then
+    # fitted by bisection, measuring every try with measure_order_strength (a transitive closure each). A
+    # ValueError is raised when that depth with mean_predecessors cannot reach order_strength, neither with
+    # edges from anywhere in the level before nor with edges about two tasks wide. diamond_share * task_count
+    # diamonds are spread over the levels. Task ids are 1..task_count level by level, with shuffle the rows are
+    # written in random order. Everything is drawn from seed
+    if chain_depth is None:
+        depth = _depth_for(task_count, order_strength, mean_predecessors, span, diamond_share)
+    else:
+        depth = max(1, min(chain_depth, task_count))
+
+    def build(locality):
+        return _generate(task_count, depth, locality, mean_predecessors, span, diamond_share, time_distribution,
+                         time_range, shuffle, seed)
+
+    if chain_depth is None:
+        return build(1.0)
+    return _fit_order_strength(build, order_strength, min(1.0, 2 * depth / task_count), chain_depth,
+                               mean_predecessors)
+
+
+def _fit_order_strength(build, order_strength, lowest, chain_depth, mean_predecessors):
+    # the tasks of build(locality) for a locality in lowest..1 whose measured order strength is closest to
+    # order_strength, by bisection on the locality
+    def measured(locality):
+        tasks = build(locality)
+        strength = measure_order_strength(ProblemInstance(tasks))
+        return abs(strength - order_strength), strength, tasks
+
+    best = measured(1.0)
+    if best[1] < order_strength - ORDER_STRENGTH_TOLERANCE:
+        raise ValueError("A chain depth of {} with {} mean predecessors reaches an order strength of at most {:.3f}, "
+                         "below {}. Use a larger depth or more predecessors".format(
+                             chain_depth, mean_predecessors, best[1], order_strength))
+    if best[0] > ORDER_STRENGTH_TOLERANCE:
+        least = measured(lowest)
+        if least[1] > order_strength + ORDER_STRENGTH_TOLERANCE:
+            raise ValueError("A chain depth of {} with {} mean predecessors reaches an order strength of at least "
+                             "{:.3f}, above {}. Use a smaller depth".format(
+                                 chain_depth, mean_predecessors, least[1], order_strength))
+        best = min(best, least, key=lambda result: result[0])
+    low, high = lowest, 1.0
+    for _ in range(FIT_ROUNDS):
+        if best[0] <= ORDER_STRENGTH_TOLERANCE:
+            break
+        locality = (low + high) / 2
+        result = measured(locality)
+        if result[0] < best[0]:
+            best = result
+        if result[1] < order_strength:
+            low = locality
+        else:
+            high = locality
+    if best[0] > ORDER_STRENGTH_TOLERANCE:
+        warnings.warn("The generated order strength is {:.3f} away from {}".format(best[0], order_strength))
+    return best[2]
+
+
+def _generate(task_count, depth, locality, mean_predecessors, span, diamond_share, time_distribution, time_range,
+              shuffle, seed):
+    rng = np.random.default_rng(seed)
+    predecessors = _layered_predecessors(rng, task_count, depth, mean_predecessors, span, locality,
+                                         int(round(diamond_share * task_count)))
+    times = task_times(rng, task_count, time_distribution, *time_range).tolist()
+    rows = rng.permutation(task_count).tolist() if shuffle else range(task_count)
+    return [Task(i + 1, "Task {}".format(i + 1), times[i], [k + 1 for k in predecessors[i]]) for i in rows]
+
+
+def write_tasks_csv(tasks, csv_file):
+    # the ID,Name,Time,Predecessors format of read_tasks_from_csv
+    with open(csv_file, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['ID', 'Name', 'Time', 'Predecessors'])
+        for task in tasks:
+            writer.writerow([task.id, task.name, task.time, ';'.join(str(k) for k in task.predecessors)])
+
+
+def measure_order_strength(instance):
+    # ordered pairs of tasks over all pairs, from the transitive closure
+    n = instance.graph.n
+    return float(instance.closure.counts().sum()) / (n * (n - 1) / 2) if n > 1 else 0.0
+
+
+def generate_instance_file(csv_file, task_count, compiled=False, **options):
+    # write generated tasks to csv_file and, with compiled, its compiled instance next to it (the file
+    # load_instance would write on first use). Returns the ProblemInstance
+    tasks = generate_tasks(task_count, **options)
+    write_tasks_csv(tasks, csv_file)
+    instance = ProblemInstance(tasks)
+    if compiled:
+        write_compiled(compiled_path(csv_file), file_digest(csv_file), instance)
+    return instance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reproducible synthetic task files")
+    parser.add_argument('csv_file', help="output file, with several task counts _<count> is added to its name")
+    parser.add_argument('--tasks', type=int, nargs='+', default=[1000], help="task counts, e.g. 100 1000 10000")
+    parser.add_argument('--order-strength', type=float, default=0.5, help="target order strength in [0, 1)")
+    parser.add_argument('--depth', type=int, help="chain depth (levels of the graph), fits the order strength by "
+                                                  "measuring it")
+    parser.add_argument('--mean-predecessors', type=float, default=2.0)
+    parser.add_argument('--span', type=int, default=2, help="levels a predecessor may lie back")
+    parser.add_argument('--diamonds', type=float, default=0.0, help="diamonds per task")
+    parser.add_argument('--times', choices=TIME_DISTRIBUTIONS, default='uniform', help="task time distribution")
+    parser.add_argument('--time-range', type=int, nargs=2, default=[1, 50], metavar=('LOW', 'HIGH'))
+    parser.add_argument('--shuffle', action='store_true', help="write the rows in random order")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compile', action='store_true', help="also write the compiled instance cache")
+    parser.add_argument('--measure', action='store_true', help="print the order strength (needs the closure)")
+    args = parser.parse_args()
+
+    stem, extension = os.path.splitext(args.csv_file)
+    directory = os.path.dirname(args.csv_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    for task_count in args.tasks:
+        csv_file = args.csv_file if len(args.tasks) == 1 else "{}_{}{}".format(stem, task_count, extension or '.csv')
+        try:
+            instance = generate_instance_file(
+                csv_file, task_count, args.compile, order_strength=args.order_strength, chain_depth=args.depth,
+                mean_predecessors=args.mean_predecessors, span=args.span, diamond_share=args.diamonds,
+                time_distribution=args.times, time_range=tuple(args.time_range), shuffle=args.shuffle, seed=args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+        line = "{}: {} tasks, {} edges".format(csv_file, instance.graph.n, instance.graph.edge_count)
+        if args.measure:
+            line += ", order strength {:.4f}".format(measure_order_strength(instance))
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
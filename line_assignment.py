@@ -0,0 +1,173 @@
+# Stations of an assembly line with a running load per station
+import sys
+
+import numpy as np
+
+# station bound of a task that is not restricted from that side (or that is waiting for an unassigned predecessor)
+UNBOUNDED = sys.maxsize
+
+
+class LineAssignment:
+    # Stations are numbered from 1 like in the scripts (station j is stations[j - 1]).
+    # Every station keeps its task list, the loads live in one NumPy array that is updated on each change,
+    # so reading a station time or all of them never sums task times again.
+    # With a precedence graph the assignment also keeps the station of every task (0 while unassigned) and, per task,
+    # the highest station of its predecessors and the lowest station of its successors. Placing a task updates the
+    # bounds of its direct neighbours in O(1) each (a count of unassigned predecessors tells when the highest
+    # predecessor station becomes final). Removing one only rescans the neighbours of a neighbour whose bound it
+    # was. Precedence checks are then plain bounds checks
+    __slots__ = ('stations', '_loads', 'graph', '_station_of', '_unassigned_predecessors',
+                 '_assigned_predecessor_max', '_max_predecessor_station', '_min_successor_station')
+
+    def __init__(self, graph=None, capacity=16):
+        self.stations = []
+        self._loads = np.zeros(capacity, dtype=np.int64)
+        self.graph = graph
+        if graph is not None:
+            self._station_of = [0] * graph.n
+            self._unassigned_predecessors = [len(predecessors) for predecessors in graph.predecessors]
+            self._assigned_predecessor_max = [0] * graph.n
+            self._max_predecessor_station = [UNBOUNDED if predecessors else 0 for predecessors in graph.predecessors]
+            self._min_successor_station = [UNBOUNDED] * graph.n
+
+    def __len__(self):
+        return len(self.stations)
+
+    def __getitem__(self, index):
+        # task list of stations[index], the list must not be modified directly
+        return self.stations[index]
+
+    def __iter__(self):
+        return iter(self.stations)
+
+    @property
+    def loads(self):
+        # NumPy view of the current station times, loads[j - 1] is the time of station j
+        return self._loads[:len(self.stations)]
+
+    def station_time(self, j):
+        return self._loads[j - 1]
+
+    def append_station(self):
+        if len(self.stations) == len(self._loads):
+            self._loads = np.concatenate([self._loads, np.zeros(len(self._loads) or 1, dtype=np.int64)])
+        self.stations.append([])
+        self._loads[len(self.stations) - 1] = 0
+
+    def pop_station(self):
+        self._loads[len(self.stations) - 1] = 0
+        return self.stations.pop()
+
+    def add(self, j, task):
+        self.stations[j - 1].append(task)
+        self._loads[j - 1] += task.time
+        if self.graph is not None:
+            self._place(self.graph.index[task.id], j)
+
+    def remove(self, j, task):
+        self.stations[j - 1].remove(task)
+        self._loads[j - 1] -= task.time
+        if self.graph is not None:
+            self._unplace(self.graph.index[task.id])
+
+    def _place(self, i, j):
+        # record task index i on station j and tighten the bounds of its direct neighbours
+        self._station_of[i] = j
+        unassigned = self._unassigned_predecessors
+        assigned_max = self._assigned_predecessor_max
+        for k in self.graph.successors[i]:
+            unassigned[k] -= 1
+            if j > assigned_max[k]:
+                assigned_max[k] = j
+            if unassigned[k] == 0:
+                self._max_predecessor_station[k] = assigned_max[k]
+        min_successor = self._min_successor_station
+        for p in self.graph.predecessors[i]:
+            if j < min_successor[p]:
+                min_successor[p] = j
+
+    def _unplace(self, i):
+        # unassign task index i. A neighbour bound is only recomputed from its own neighbours when i was the task
+        # holding it
+        station_of = self._station_of
+        j = station_of[i]
+        station_of[i] = 0
+        assigned_max = self._assigned_predecessor_max
+        for k in self.graph.successors[i]:
+            self._unassigned_predecessors[k] += 1
+            self._max_predecessor_station[k] = UNBOUNDED
+            if assigned_max[k] == j:
+                assigned_max[k] = max([station_of[p] for p in self.graph.predecessors[k]])
+        min_successor = self._min_successor_station
+        for p in self.graph.predecessors[i]:
+            if min_successor[p] == j:
+                min_successor[p] = min([station_of[k] for k in self.graph.successors[p] if station_of[k]],
+                                       default=UNBOUNDED)
+
+    def station_of(self, task):
+        # station number of task, 0 if it is not assigned
+        return self._station_of[self.graph.index[task.id]]
+
+    def lowest_station(self, task):
+        # first station task could go to, given where its predecessors are (UNBOUNDED while one is unassigned)
+        return max(1, self._max_predecessor_station[self.graph.index[task.id]])
+
+    def can_assign(self, task, j):
+        # all predecessors of task are assigned at station j or before
+        return self._max_predecessor_station[self.graph.index[task.id]] <= j
+
+    def can_move(self, task, j):
+        # task can be put on station j: predecessors at station j or before, assigned successors at station j or after
+        i = self.graph.index[task.id]
+        return self._max_predecessor_station[i] <= j <= self._min_successor_station[i]
+
+    def station_bounds(self, indices=None):
+        # NumPy arrays indexed by task: its station (0 while unassigned) and the lowest and highest station it could
+        # be moved to, so feasibility of many moves can be checked at once. With indices (task indices) only the
+        # values of those tasks, in that order
+        if indices is None:
+            station_of = self._station_of
+            max_predecessor = self._max_predecessor_station
+            min_successor = self._min_successor_station
+        else:
+            station_of = [self._station_of[i] for i in indices]
+            max_predecessor = [self._max_predecessor_station[i] for i in indices]
+            min_successor = [self._min_successor_station[i] for i in indices]
+        low = np.maximum(np.array(max_predecessor, dtype=np.int64), 1)
+        high = np.minimum(np.array(min_successor, dtype=np.int64), len(self.stations))
+        return np.array(station_of, dtype=np.int64), low, high
+
+    def can_trade(self, task1, task2):
+        # task1 and task2 can swap stations. The bounds cover every case except a direct precedence between the
+        # two tasks, which the swap would invert whenever they sit on different stations
+        j1 = self.station_of(task1)
+        j2 = self.station_of(task2)
+        if not (self.can_move(task1, j2) and self.can_move(task2, j1)):
+            return False
+        i1 = self.graph.index[task1.id]
+        i2 = self.graph.index[task2.id]
+        return j1 == j2 or (i2 not in self.graph.successors[i1] and i1 not in self.graph.successors[i2])
+
+    def transfer(self, task, j_from, j_to):
+        # move task from station j_from to the end of station j_to
+        self.remove(j_from, task)
+        self.add(j_to, task)
+
+    def trade(self, task1, j1, task2, j2):
+        # swap task1 on station j1 with task2 on station j2, each task goes to the end of the other station
+        self.remove(j1, task1)
+        self.add(j2, task1)
+        self.remove(j2, task2)
+        self.add(j1, task2)
+
+    def copy(self):
+        duplicate = LineAssignment(self.graph, len(self._loads))
+        duplicate.stations = [list(station) for station in self.stations]
+        duplicate._loads[:] = self._loads
+        if self.graph is not None:
+            duplicate._station_of = list(self._station_of)
+            duplicate._unassigned_predecessors = list(self._unassigned_predecessors)
+            duplicate._assigned_predecessor_max = list(self._assigned_predecessor_max)
+            duplicate._max_predecessor_station = list(self._max_predecessor_station)
+            duplicate._min_successor_station = list(self._min_successor_station)
+        return duplicate
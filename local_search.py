@@ -0,0 +1,312 @@
+# Simulated annealing and tabu search over station assignments, built on the MYM transfer and trade moves
+import argparse
+import math
+import random
+import time
+from collections import Counter
+
+import profiling
+from line_assignment import LineAssignment
+from metrics import calculate_balance_rate, calculate_smoothing_index
+from mym_solver import PRIORITY_RULES, MoodieYoungSolver
+from problem_instance import load_instance
+
+
+class Objective:
+    # cost = station_weight * stations + smoothing_weight * SI + balance_weight * (1 - eta), over the non empty
+    # stations. eta is defined like calculate_balance_rate. By default one station more always costs more than any
+    # smoothing index can save (SI never exceeds beat * stations)
+    def __init__(self, station_weight=None, smoothing_weight=1.0, balance_weight=0.0):
+        self.station_weight = station_weight
+        self.smoothing_weight = smoothing_weight
+        self.balance_weight = balance_weight
+
+    def cost(self, used, top, square_sum, total_time, station_weight):
+        # SI from the running sums: sum((top - L)^2) = used * top^2 - 2 * top * sum(L) + sum(L^2)
+        squares = used * top * top - 2 * top * total_time + square_sum
+        cost = station_weight * used + self.smoothing_weight * math.sqrt(max(squares, 0))
+        if self.balance_weight:
+            cost += self.balance_weight * (1 - total_time / (top * (used + 1)))
+        return cost
+
+
+class LocalSearchResult:
+    def __init__(self, stations, cost, moves, accepted, elapsed):
+        # stations is the best assignment found (empty stations dropped), moves counts the evaluated moves
+        self.stations = stations
+        self.cost = cost
+        self.moves = moves
+        self.accepted = accepted
+        self.elapsed = elapsed
+
+    @property
+    def station_count(self):
+        return len(self.stations)
+
+    @property
+    def balance_rate(self):
+        return float(calculate_balance_rate(self.stations))
+
+    @property
+    def smoothing_index(self):
+        return float(calculate_smoothing_index(self.stations))
+
+
+class LocalSearch:
+    # The state is the station of every task plus the station loads, the number of stations at each load that
+    # occurs (a Counter, so its size does not grow with the beat) and the running sum of squared loads. A move
+    # (transfer of a task to another station, or trade of two tasks) is drawn at random and checked against the
+    # stations of the direct predecessors and successors of the moved tasks, so proposing, scoring and applying a
+    # move costs O(task degree) whatever the size of the line. The new highest load comes from the counts, which
+    # only have to be scanned when the last station at the top load gets lighter
+    def __init__(self, instance, beat, objective=None):
+        graph = instance.graph
+        self.instance = instance
+        self.beat = beat
+        self.objective = objective or Objective()
+        self.n = graph.n
+        self.times = graph.times.tolist()
+        self.total_time = sum(self.times)
+        self.predecessors = graph.predecessors
+        self.successors = graph.successors
+        self.neighbours = [set(graph.predecessors[i]) | set(graph.successors[i]) for i in range(graph.n)]
+
+    def _start(self, start):
+        # take over a LineAssignment (or a solution holding one in .stations) as the current state
+        if not isinstance(start, LineAssignment):
+            start = start.stations
+        if len(start) and int(start.loads.max()) > self.beat:
+            raise ValueError("Start assignment exceeds the beat {}".format(self.beat))
+        index = self.instance.graph.index
+        self.order = [index[task.id] for station in start for task in station]
+        if len(self.order) != self.n:
+            raise ValueError("Start assignment does not hold every task")
+        self.station_count = len(start)
+        self.station_of = [0] * self.n
+        for j, station in enumerate(start, 1):
+            for task in station:
+                self.station_of[index[task.id]] = j
+        # loads and station numbers from 1, index 0 is unused
+        self.loads = [0] + [int(load) for load in start.loads]
+        self.counts = Counter(self.loads[1:])
+        self.used = self.station_count - self.counts[0]
+        self.top = max(self.loads)
+        self.square_sum = sum(load * load for load in self.loads)
+        self.station_weight = self.objective.station_weight
+        if self.station_weight is None:
+            self.station_weight = self.beat * max(self.station_count, 1) * self.objective.smoothing_weight + 1
+        return self._cost(self.used, self.top, self.square_sum)
+
+    def _cost(self, used, top, square_sum):
+        return self.objective.cost(used, top, square_sum, self.total_time, self.station_weight)
+
+    def _bounds(self, i):
+        # lowest and highest station task i can be on, given the stations of its direct neighbours
+        station_of = self.station_of
+        low = 1
+        for p in self.predecessors[i]:
+            if station_of[p] > low:
+                low = station_of[p]
+        high = self.station_count
+        for k in self.successors[i]:
+            if station_of[k] < high:
+                high = station_of[k]
+        return low, high
+
+    def _propose(self, rng, trade_probability):
+        # a random feasible move (i, a, b, k, d): task i from station a to b, task k (-1 for a transfer) from b to
+        # a, d the time that leaves station a. None when the drawn move is not feasible
+        station_of = self.station_of
+        times = self.times
+        i = rng.randrange(self.n)
+        a = station_of[i]
+        low, high = self._bounds(i)
+        if rng.random() < trade_probability:
+            k = rng.randrange(self.n)
+            b = station_of[k]
+            if b == a or not low <= b <= high or k in self.neighbours[i]:
+                return None
+            low_k, high_k = self._bounds(k)
+            if not low_k <= a <= high_k:
+                return None
+            d = times[i] - times[k]
+        else:
+            if low == high:
+                return None
+            b = rng.randint(low, high - 1)
+            if b >= a:
+                b += 1
+            k = -1
+            d = times[i]
+        if self.loads[a] - d > self.beat or self.loads[b] + d > self.beat:
+            return None
+        return i, a, b, k, d
+
+    def _evaluate(self, a, b, d):
+        # (cost, used, top, square_sum) after moving time d from station a to station b
+        loads = self.loads
+        old_a, old_b = loads[a], loads[b]
+        new_a, new_b = old_a - d, old_b + d
+        square_sum = self.square_sum + new_a * new_a + new_b * new_b - old_a * old_a - old_b * old_b
+        used = self.used + (new_a > 0) - (old_a > 0) + (new_b > 0) - (old_b > 0)
+        top = self.top
+        if new_a > top or new_b > top:
+            top = max(new_a, new_b)
+        elif old_a == top or old_b == top:
+            counts = self.counts
+            if counts[top] == (old_a == top) + (old_b == top) and new_a != top and new_b != top:
+                # no station is left at the top load, the highest of the others or of the two new loads is
+                top = max(new_a, new_b, max((load for load, count in counts.items()
+                                             if load < top and count > (load == old_a) + (load == old_b)),
+                                            default=0))
+        return self._cost(used, top, square_sum), used, top, square_sum
+
+    def _apply(self, move, used, top, square_sum):
+        i, a, b, k, d = move
+        self.station_of[i] = b
+        if k >= 0:
+            self.station_of[k] = a
+        loads = self.loads
+        counts = self.counts
+        for load in (loads[a], loads[b]):
+            counts[load] -= 1
+            if not counts[load]:
+                del counts[load]
+        loads[a] -= d
+        loads[b] += d
+        counts[loads[a]] += 1
+        counts[loads[b]] += 1
+        self.used, self.top, self.square_sum = used, top, square_sum
+
+    def _result(self, station_of, cost, moves, accepted, start_time):
+        # LineAssignment of station_of without its empty stations, tasks in the order of the start assignment
+        numbers = {}
+        for j in sorted(set(station_of)):
+            numbers[j] = len(numbers) + 1
+        stations = LineAssignment(self.instance.graph)
+        for _ in numbers:
+            stations.append_station()
+        for i in sorted(self.order, key=lambda i: station_of[i]):
+            stations.add(numbers[station_of[i]], self.instance.tasks[i])
+        if profiling.active is not None:
+            profiling.active.count('local_search_moves', moves)
+            profiling.active.count('local_search_accepted', accepted)
+        return LocalSearchResult(stations, cost, moves, accepted, time.perf_counter() - start_time)
+
+    @profiling.timed('anneal')
+    def anneal(self, start, iterations=None, time_limit=None, seed=None, initial_temperature=None,
+               final_temperature=None, trade_probability=0.5):
+        # Simulated annealing from start. The temperature falls geometrically from initial_temperature (a tenth of
+        # the beat by default) to final_temperature (a thousandth of the initial one) over the iterations or the
+        # time limit, whichever runs out first. At least one of them must be given
+        if iterations is None and time_limit is None:
+            raise ValueError("Annealing needs iterations or a time limit")
+        start_time = time.perf_counter()
+        rng = random.Random(seed)
+        current = self._start(start)
+        best_cost, best = current, list(self.station_of)
+        initial_temperature = initial_temperature or self.beat / 10
+        final_temperature = final_temperature or initial_temperature / 1000
+        temperature = initial_temperature
+        moves = accepted = 0
+        while iterations is None or moves < iterations:
+            if moves % 1024 == 0:
+                progress = 0 if iterations is None else moves / iterations
+                if time_limit is not None:
+                    elapsed = time.perf_counter() - start_time
+                    if elapsed >= time_limit:
+                        break
+                    progress = max(progress, elapsed / time_limit)
+                temperature = initial_temperature * (final_temperature / initial_temperature) ** progress
+            moves += 1
+            move = self._propose(rng, trade_probability)
+            if move is None:
+                continue
+            cost, used, top, square_sum = self._evaluate(move[1], move[2], move[4])
+            delta = cost - current
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                self._apply(move, used, top, square_sum)
+                current = cost
+                accepted += 1
+                if cost < best_cost:
+                    best_cost, best = cost, list(self.station_of)
+        return self._result(best, best_cost, moves, accepted, start_time)
+
+    @profiling.timed('tabu_search')
+    def tabu_search(self, start, iterations=None, time_limit=None, seed=None, candidates=32, tenure=None,
+                    trade_probability=0.5):
+        # Tabu search from start. Every iteration draws candidates random moves and makes the cheapest one whose
+        # tasks are not tabu, even when it is worse than the current state. A moved task stays tabu for tenure
+        # iterations (a tenth of the tasks by default), unless the move leads to a new best
+        if iterations is None and time_limit is None:
+            raise ValueError("Tabu search needs iterations or a time limit")
+        start_time = time.perf_counter()
+        rng = random.Random(seed)
+        current = self._start(start)
+        best_cost, best = current, list(self.station_of)
+        tenure = tenure or max(1, self.n // 10)
+        tabu_until = [0] * self.n
+        iteration = moves = accepted = 0
+        while iterations is None or iteration < iterations:
+            if time_limit is not None and iteration % 64 == 0 and time.perf_counter() - start_time >= time_limit:
+                break
+            iteration += 1
+            chosen = None
+            for _ in range(candidates):
+                moves += 1
+                move = self._propose(rng, trade_probability)
+                if move is None:
+                    continue
+                evaluation = self._evaluate(move[1], move[2], move[4])
+                if chosen is not None and evaluation[0] >= chosen[1][0]:
+                    continue
+                i, k = move[0], move[3]
+                if evaluation[0] < best_cost or (tabu_until[i] <= iteration and (k < 0 or tabu_until[k] <= iteration)):
+                    chosen = move, evaluation
+            if chosen is None:
+                continue
+            move, (cost, used, top, square_sum) = chosen
+            self._apply(move, used, top, square_sum)
+            accepted += 1
+            tabu_until[move[0]] = iteration + tenure
+            if move[3] >= 0:
+                tabu_until[move[3]] = iteration + tenure
+            if cost < best_cost:
+                best_cost, best = cost, list(self.station_of)
+        return self._result(best, best_cost, moves, accepted, start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Improve a MYM line by simulated annealing or tabu search")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--beat', type=int, default=54)
+    parser.add_argument('--method', choices=['anneal', 'tabu'], default='anneal')
+    parser.add_argument('--start-rule', default='max_time', choices=sorted(PRIORITY_RULES),
+                        help="MYM rule of the start assignment")
+    parser.add_argument('--iterations', type=int, help="moves (annealing) or iterations (tabu search)")
+    parser.add_argument('--time-limit', type=float, help="seconds, 10 when no iteration count is given")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    instance = load_instance(args.csv_file, cache=args.cache)
+    start = MoodieYoungSolver(instance).solve(args.beat, args.start_rule, args.seed)
+    time_limit = args.time_limit if args.time_limit is not None or args.iterations is not None else 10
+    search = LocalSearch(instance, args.beat)
+    if args.method == 'anneal':
+        result = search.anneal(start, args.iterations, time_limit, args.seed)
+    else:
+        result = search.tabu_search(start, args.iterations, time_limit, args.seed)
+    print("Start:", start.station_count, "stations, SI", round(start.smoothing_index, 4))
+    print("The number of stations is", result.station_count)
+    for index, station in enumerate(result.stations):
+        print("Station", index + 1, "operates Task", [task.id for task in station])
+    print("The time of each station is", result.stations.loads.tolist())
+    print("Balance Rate eta =", result.balance_rate)
+    print("Smoothing Index SI =", result.smoothing_index)
+    print(result.moves, "moves in", round(result.elapsed, 3), "s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Lower bounds on the number of stations (SALBP-1) for a given beat
+import numpy as np
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def total_time_bound(times, beat):
+    # every station holds at most beat of work: ceil(sum of task times / beat)
+    return int(ceil_div(int(times.sum()), beat))
+
+
+def half_beat_bound(times, beat):
+    # two tasks longer than beat / 2 never share a station, two tasks of exactly beat / 2 fill one
+    doubled = 2 * times
+    return int(np.count_nonzero(doubled > beat) + ceil_div(np.count_nonzero(doubled == beat), 2))
+
+
+def third_beat_bound(times, beat):
+    # bin packing weights in sixths of a station: over 2/3 of the beat counts as a full station, exactly 2/3 as 2/3,
+    # between 1/3 and 2/3 as 1/2 and exactly 1/3 as 1/3. No station can hold more than one full weight
+    tripled = 3 * times
+    sixths = (6 * np.count_nonzero(tripled > 2 * beat)
+              + 4 * np.count_nonzero(tripled == 2 * beat)
+              + 3 * np.count_nonzero((tripled > beat) & (tripled < 2 * beat))
+              + 2 * np.count_nonzero(tripled == beat))
+    return int(ceil_div(sixths, 6))
+
+
+def station_interval_bound(weights, beat):
+    # task i cannot go before station ceil(head_time / beat) (itself and all its ancestors must fit in front of it)
+    # and needs ceil(rpw / beat) - 1 stations after it for its descendants, so the line has at least
+    # max over i of ceil(head_time / beat) + ceil(rpw / beat) - 1 stations
+    return int((ceil_div(weights.head_time, beat) + ceil_div(weights.rpw, beat) - 1).max())
+
+
+def station_lower_bounds(instance, beat):
+    # every bound by name, plus the best (largest) one
+    times = instance.graph.times
+    bounds = {
+        'total_time': total_time_bound(times, beat),
+        'half_beat': half_beat_bound(times, beat),
+        'third_beat': third_beat_bound(times, beat),
+        'station_interval': station_interval_bound(instance.weights, beat),
+    }
+    bounds['best'] = max(bounds.values())
+    return bounds
+
+
+def station_lower_bound(instance, beat):
+    return station_lower_bounds(instance, beat)['best']
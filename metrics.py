@@ -0,0 +1,75 @@
+# Line balancing metrics computed from the station loads
+import numpy as np
+
+
+def calculate_balance_rate(stations):
+    stations_time = stations.loads
+    actual_beat = stations_time.max()
+    station_quantity = len(stations) + 1
+    eta = np.sum(stations_time) / (actual_beat * station_quantity)
+    return eta
+
+
+def calculate_smoothing_index(stations):
+    stations_time = stations.loads
+    time_max = stations_time.max()
+    stations_time_delta = stations_time - time_max
+    SI = np.sqrt(np.sum(np.square(stations_time_delta)))
+    return SI
+
+
+class LineMetrics:
+    # The metrics of a batch of lines, one array entry per line. balance_rate is eta of calculate_balance_rate
+    # (with its station count + 1), smoothing_index is SI. balance_delay and idle_time are measured against cycle,
+    # the beat when one was given, else the heaviest station of the line
+    def __init__(self, station_counts, total, max_load, min_load, cycle, balance_rate, smoothing_index,
+                 balance_delay, idle_time):
+        self.station_counts = station_counts
+        self.total = total
+        self.max_load = max_load
+        self.min_load = min_load
+        self.cycle = cycle
+        self.balance_rate = balance_rate
+        self.smoothing_index = smoothing_index
+        self.balance_delay = balance_delay
+        self.idle_time = idle_time
+
+    def __len__(self):
+        return len(self.station_counts)
+
+    def ranking(self):
+        # line indices from the best line down: fewest stations, then lowest SI, then the line listed first
+        return np.lexsort((np.arange(len(self)), self.smoothing_index, self.station_counts))
+
+
+def stack_loads(lines):
+    # station loads of lines (LineAssignments or load sequences) as one (lines x stations) array, short lines
+    # padded with zeros, and the station count of every line
+    loads = [np.asarray(line.loads if hasattr(line, 'loads') else line) for line in lines]
+    station_counts = np.array([len(line) for line in loads], dtype=np.int64)
+    table = np.zeros((len(loads), max(station_counts.max(initial=0), 1)), dtype=np.float64)
+    for row, line in zip(table, loads):
+        row[:len(line)] = line
+    return table, station_counts
+
+
+def batch_metrics(loads, station_counts=None, beat=None):
+    # Metrics of every row of loads (lines x stations) in one pass of array operations, a 1-D loads is a batch of
+    # one line. Only the first station_counts[k] entries of row k are stations, by default the whole row
+    loads = np.atleast_2d(np.asarray(loads, dtype=np.float64))
+    if station_counts is None:
+        station_counts = np.full(len(loads), loads.shape[1], dtype=np.int64)
+    station_counts = np.asarray(station_counts, dtype=np.int64)
+    in_use = np.arange(loads.shape[1]) < station_counts[:, None]
+    total = np.where(in_use, loads, 0).sum(axis=1)
+    max_load = np.where(in_use, loads, -np.inf).max(axis=1)
+    min_load = np.where(in_use, loads, np.inf).min(axis=1)
+    smoothing_index = np.sqrt(np.where(in_use, np.square(max_load[:, None] - loads), 0).sum(axis=1))
+    cycle = max_load if beat is None else np.full(len(loads), float(beat))
+    capacity = station_counts * cycle
+    idle_time = capacity - total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance_rate = total / (max_load * (station_counts + 1))
+        balance_delay = idle_time / capacity
+    return LineMetrics(station_counts, total, max_load, min_load, cycle, balance_rate, smoothing_index,
+                       balance_delay, idle_time)
@@ -0,0 +1,284 @@
+# Vectorized scoring of the transfer and trade moves of a line, for one station pair or for all of them
+import numpy as np
+
+from trade_transfer import TRADE, TRANSFER, command_moves
+
+
+def _segment_argmin(values, row_starts, column_starts):
+    # Minimum of every block of values cut at row_starts and column_starts (starts of non-empty segments), with the
+    # row and column of its first occurrence in the order of a flat argmin over the block: the first row holding
+    # it, then the first column in that row. Returns three arrays of shape (row segments, column segments)
+    rows, columns = values.shape
+    row_lengths = np.diff(np.append(row_starts, rows))
+    column_lengths = np.diff(np.append(column_starts, columns))
+    row_min = np.minimum.reduceat(values, column_starts, axis=1)
+    first_column = np.minimum.reduceat(
+        np.where(values == np.repeat(row_min, column_lengths, axis=1), np.arange(columns), columns),
+        column_starts, axis=1)
+    block_min = np.minimum.reduceat(row_min, row_starts, axis=0)
+    first_row = np.minimum.reduceat(
+        np.where(row_min == np.repeat(block_min, row_lengths, axis=0), np.arange(rows)[:, None], rows),
+        row_starts, axis=0)
+    return block_min, first_row, np.take_along_axis(first_column, first_row, axis=0)
+
+
+class MoveScorer:
+    # Scores moves as NumPy arrays instead of checking one candidate at a time. Feasibility comes from the station
+    # bounds of LineAssignment (a task may go to any station between its lowest and highest one) and from a mask of
+    # the direct precedences between the two sides of a trade, which the bounds alone do not exclude.
+    # The bounds and the task indices of every station are read once and then only refreshed by touched() for the
+    # stations a move has changed and the direct neighbours of their tasks
+    def __init__(self, stations, block_elements=1 << 22):
+        self.stations = stations
+        self.block_elements = block_elements
+        graph = stations.graph
+        self.times = graph.times
+        # direct predecessors and successors of every task as one CSR structure
+        sources = np.repeat(np.arange(graph.n, dtype=np.int64), graph.out_degrees())
+        ends = np.concatenate([sources, graph.succ_indices])
+        others = np.concatenate([graph.succ_indices, sources])
+        order = np.argsort(ends, kind='stable')
+        self.neighbour_indptr = np.zeros(graph.n + 1, dtype=np.int64)
+        self.neighbour_indptr[1:] = np.cumsum(np.bincount(ends, minlength=graph.n))
+        self.neighbour_indices = others[order]
+        self._column_position = np.full(graph.n, -1, dtype=np.int64)
+        self.tasks = [None] * graph.n
+        for station in stations:
+            for task in station:
+                self.tasks[graph.index[task.id]] = task
+        self.station_of, self.low, self.high = stations.station_bounds()
+        self._station_tasks = {}
+        # MoveTrace of the candidates, set by trade_and_transfer when its trace records them
+        self.trace = None
+
+    def touched(self, *js):
+        # Refresh what a move between the stations js has changed: their task lists and the bounds of their tasks
+        # and of the direct neighbours of those. Returns the stations holding a task whose bounds changed, js
+        # included
+        for j in js:
+            self._station_tasks.pop(j, None)
+        tasks = np.concatenate([self.station_tasks(j) for j in js])
+        affected = np.unique(np.concatenate([tasks, self.neighbours(tasks)]))
+        station_of, low, high = self.stations.station_bounds(affected.tolist())
+        changed = (low != self.low[affected]) | (high != self.high[affected])
+        self.station_of[affected] = station_of
+        self.low[affected] = low
+        self.high[affected] = high
+        return set(js) | set(station_of[changed].tolist())
+
+    def station_tasks(self, j):
+        # task indices of station j in station order
+        if j not in self._station_tasks:
+            index = self.stations.graph.index
+            station = self.stations[j - 1]
+            self._station_tasks[j] = np.fromiter((index[task.id] for task in station), dtype=np.int64,
+                                                 count=len(station))
+        return self._station_tasks[j]
+
+    def line_tasks(self):
+        # task indices of the whole line, station by station
+        stations = [self.station_tasks(j) for j in range(1, len(self.stations) + 1)]
+        return np.concatenate(stations) if stations else np.zeros(0, dtype=np.int64)
+
+    def neighbours(self, tasks):
+        # direct predecessors and successors of tasks, back to back
+        return self.neighbour_indices[self._neighbour_slots(tasks)[1]]
+
+    def _neighbour_slots(self, tasks):
+        # (position in tasks, slot in neighbour_indices) of every neighbour of tasks
+        starts = self.neighbour_indptr[tasks]
+        counts = self.neighbour_indptr[tasks + 1] - starts
+        ends = np.cumsum(counts)
+        positions = np.repeat(np.arange(len(tasks)), counts)
+        return positions, np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+    def edge_mask(self, rows, columns):
+        # False where a row task and a column task are joined by a direct precedence, in either direction. Only
+        # the neighbours of the row tasks are looked at
+        column_position = self._column_position
+        column_position[columns] = np.arange(len(columns))
+        r, slots = self._neighbour_slots(rows)
+        c = column_position[self.neighbour_indices[slots]]
+        column_position[columns] = -1
+        hit = c >= 0
+        mask = np.ones((len(rows), len(columns)), dtype=bool)
+        mask[r[hit], c[hit]] = False
+        return mask
+
+    def score_pair(self, j_from, j_to):
+        # MYM expected_g of every transfer from j_from to j_to (one per task of j_from) and of every trade between
+        # them (task of j_from x task of j_to), np.inf where the move is not allowed. Both tasks of a move must be
+        # shorter than the load difference limit of the two stations
+        loads = self.stations.loads
+        limit = int(loads[j_from - 1] - loads[j_to - 1])
+        rows = self.station_tasks(j_from)
+        columns = self.station_tasks(j_to)
+        low, high = self.low, self.high
+        times1 = self.times[rows]
+        times2 = self.times[columns]
+        fits1 = (times1 < limit) & (low[rows] <= j_to) & (j_to <= high[rows])
+        fits2 = (times2 < limit) & (low[columns] <= j_from) & (j_from <= high[columns])
+        transfer_g = np.where(fits1, 0.5 * limit - times1, np.inf)
+        allowed = fits1[:, None] & fits2[None, :] & self.edge_mask(rows, columns)
+        trade_g = np.where(allowed, limit - 2.0 * (times1[:, None] - times2[None, :]), np.inf)
+        return rows, columns, transfer_g, trade_g
+
+    def best_pair_move(self, j_from, j_to):
+        # the move MoveFinder selects between j_from and j_to: the smallest expected_g, on ties the transfer, then
+        # the task (pair) listed first on its station. Same command tuples as MoveFinder.best_move
+        rows, columns, transfer_g, trade_g = self.score_pair(j_from, j_to)
+        transfer = int(transfer_g.argmin()) if transfer_g.size else None
+        trade = int(trade_g.argmin()) if trade_g.size else None
+        if transfer is not None and np.isinf(transfer_g[transfer]):
+            transfer = None
+        if trade is not None and np.isinf(trade_g.flat[trade]):
+            trade = None
+        if transfer is not None:
+            transfer = TRANSFER, float(transfer_g[transfer]), self.tasks[rows[transfer]], j_from, j_to
+        if trade is not None:
+            a, b = divmod(trade, len(columns))
+            trade = TRADE, float(trade_g[a, b]), self.tasks[rows[a]], j_from, self.tasks[columns[b]], j_to
+        return self.select(transfer, trade)
+
+    def select(self, transfer, trade):
+        # the transfer command unless the trade command scores lower (either may be None), after tracing both
+        if self.trace is not None:
+            for command in (transfer, trade):
+                if command is not None:
+                    kind, moves = command_moves(command)
+                    self.trace.candidate(kind, command[1], moves)
+        if transfer is not None and (trade is None or transfer[1] <= trade[1]):
+            return transfer
+        return trade
+
+
+class PairMoveFinder(MoveScorer):
+    # the classic MYM neighbourhood (heaviest against lightest station), scored with arrays
+    def best_move(self):
+        loads = self.stations.loads
+        return self.best_pair_move(int(loads.argmax()) + 1, int(loads.argmin()) + 1)
+
+
+class AllPairsMoveFinder(MoveScorer):
+    # Every transfer of a task to any other station and every trade between tasks of two different stations.
+    # The expected_g of two station pairs with different load differences cannot be compared, so moves are ranked
+    # by the change of the sum of squared station times instead: moving work d from a station to one that is
+    # lighter by difference changes it by 2 * d * (d - difference). Only moves that lower it are taken, which keeps
+    # the descent finite.
+    # The best transfer and the best trade of every station pair (j1, j2) are kept in (stations x stations)
+    # arrays. A move only rescores the rows and columns of the stations touched() reports, the pairs of all other
+    # stations have the same loads, tasks and bounds as before. Scoring works in blocks of about block_elements
+    # entries
+    def __init__(self, stations, block_elements=1 << 22):
+        super().__init__(stations, block_elements)
+        m = len(stations)
+        # change of the best move of each pair, np.inf for none, and the position of its task(s) on their stations
+        self.transfer_change = np.full((m, m), np.inf)
+        self.transfer_position = np.zeros((m, m), dtype=np.int64)
+        self.trade_change = np.full((m, m), np.inf)
+        self.trade_positions = np.zeros((m, m, 2), dtype=np.int64)
+        self._score(range(1, m + 1), range(1, m + 1))
+
+    def touched(self, *js):
+        changed = sorted(super().touched(*js))
+        every = range(1, len(self.stations) + 1)
+        self._score(changed, every)
+        self._score(every, changed)
+        return set(changed)
+
+    def _score(self, row_stations, column_stations):
+        # rescore the pairs (j1, j2) of j1 in row_stations and j2 in column_stations, row stations a few at a time
+        # in order of load. Both kinds of move only go to a lighter station, so a pair whose j2 is not lighter than
+        # j1 stays np.inf and each group of row stations is only scored against the stations lighter than its
+        # heaviest one
+        row_stations = np.array(list(row_stations), dtype=np.int64)
+        column_stations = np.array(list(column_stations), dtype=np.int64)
+        if not len(row_stations) or not len(column_stations):
+            return
+        self.transfer_change[np.ix_(row_stations - 1, column_stations - 1)] = np.inf
+        self.trade_change[np.ix_(row_stations - 1, column_stations - 1)] = np.inf
+        loads = self.stations.loads
+        row_stations = row_stations[loads[row_stations - 1] > loads[column_stations - 1].min()]
+        row_stations = row_stations[np.argsort(loads[row_stations - 1], kind='stable')].tolist()
+        width = max(sum(len(self.stations[j - 1]) for j in column_stations.tolist()), len(column_stations))
+        rows_per_block = max(1, self.block_elements // width)
+        group, group_rows = [], 0
+        for position, j in enumerate(row_stations):
+            group.append(j)
+            group_rows += len(self.stations[j - 1])
+            if group_rows >= rows_per_block or position == len(row_stations) - 1:
+                lighter = column_stations[loads[column_stations - 1] < loads[j - 1]]
+                if len(lighter):
+                    self._score_block(np.array(group, dtype=np.int64), lighter)
+                group, group_rows = [], 0
+
+    def _score_block(self, row_stations, column_stations):
+        row_tasks = [self.station_tasks(j) for j in row_stations.tolist()]
+        column_tasks = [self.station_tasks(j) for j in column_stations.tolist()]
+        row_lengths = np.array([len(tasks) for tasks in row_tasks], dtype=np.int64)
+        column_lengths = np.array([len(tasks) for tasks in column_tasks], dtype=np.int64)
+        if not row_lengths.sum():
+            return
+        rows = np.concatenate(row_tasks)
+        row_owner = np.repeat(row_stations, row_lengths)
+        row_starts = np.cumsum(row_lengths) - row_lengths
+        filled = row_lengths > 0
+        loads = self.stations.loads.astype(np.float64)
+        row_times = self.times[rows, None].astype(np.float64)
+        row_load = loads[row_owner - 1, None]
+        low = self.low[rows, None]
+        high = self.high[rows, None]
+
+        # transfers of the row tasks to the column stations
+        change = 2 * row_times * (row_times - (row_load - loads[column_stations - 1]))
+        allowed = ((low <= column_stations) & (column_stations <= high) & (column_stations != row_owner[:, None])
+                   & (change < 0))
+        change = np.where(allowed, change, np.inf)
+        best, first_row, _ = _segment_argmin(change, row_starts[filled], np.arange(len(column_stations)))
+        index = np.ix_(row_stations[filled] - 1, column_stations - 1)
+        self.transfer_change[index] = best
+        self.transfer_position[index] = first_row - row_starts[filled, None]
+
+        # trades of the row tasks against the tasks of the column stations
+        if not column_lengths.sum():
+            return
+        columns = np.concatenate(column_tasks)
+        column_owner = np.repeat(column_stations, column_lengths)
+        column_starts = np.cumsum(column_lengths) - column_lengths
+        column_filled = column_lengths > 0
+        moved = row_times - self.times[columns].astype(np.float64)
+        difference = row_load - loads[column_owner - 1]
+        change = 2 * moved * (moved - difference)
+        allowed = ((difference > 0) & (change < 0)
+                   & (low <= column_owner) & (column_owner <= high)
+                   & (self.low[columns] <= row_owner[:, None]) & (row_owner[:, None] <= self.high[columns])
+                   & self.edge_mask(rows, columns))
+        change = np.where(allowed, change, np.inf)
+        best, first_row, first_column = _segment_argmin(change, row_starts[filled], column_starts[column_filled])
+        index = np.ix_(row_stations[filled] - 1, column_stations[column_filled] - 1)
+        self.trade_change[index] = best
+        self.trade_positions[index] = np.stack([first_row - row_starts[filled, None],
+                                                first_column - column_starts[column_filled]], axis=-1)
+
+    def best_move(self):
+        # the command with the lowest change as (TRANSFER, change, task, j_from, j_to) or
+        # (TRADE, change, task1, j1, task2, j2), ties go to the transfer and then to the task (pair) listed first
+        # on the line, i.e. by station and then by position on the station
+        best_transfer = None
+        best_trade = None
+        change = self.transfer_change.min() if self.transfer_change.size else np.inf
+        if np.isfinite(change):
+            pairs = np.argwhere(self.transfer_change == change)
+            j1, j2 = min(pairs.tolist(), key=lambda pair: (pair[0], self.transfer_position[pair[0], pair[1]], pair[1]))
+            task = self.tasks[self.station_tasks(j1 + 1)[self.transfer_position[j1, j2]]]
+            best_transfer = TRANSFER, float(change), task, j1 + 1, j2 + 1
+        change = self.trade_change.min() if self.trade_change.size else np.inf
+        if np.isfinite(change):
+            pairs = np.argwhere(self.trade_change == change)
+            positions = self.trade_positions
+            j1, j2 = min(pairs.tolist(), key=lambda pair: (pair[0], positions[pair[0], pair[1], 0], pair[1],
+                                                           positions[pair[0], pair[1], 1]))
+            a, b = positions[j1, j2].tolist()
+            best_trade = (TRADE, float(change), self.tasks[self.station_tasks(j1 + 1)[a]], j1 + 1,
+                          self.tasks[self.station_tasks(j2 + 1)[b]], j2 + 1)
+        return self.select(best_transfer, best_trade)
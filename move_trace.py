@@ -0,0 +1,184 @@
+# Leveled JSONL event stream of the trade and transfer loop, and its replay into the sequence of assignments
+import argparse
+import json
+
+# What a MoveTrace records: every executed move, also the station loads after it, also the best transfer and
+# trade candidates the move search found before it
+MOVES = 1
+LOADS = 2
+CANDIDATES = 3
+LEVELS = {'moves': MOVES, 'loads': LOADS, 'candidates': CANDIDATES}
+
+# JSON lines kept in memory before a file sink is written to
+BUFFER_EVENTS = 4096
+
+
+class MoveTrace:
+    # sink is a file path, an open text file or a callable that gets every event as a dict. File output is
+    # buffered JSONL, one event per line, written in blocks of buffer_events lines and when a run ends.
+    # Events: start (the assignment and task times), candidate, move and undo (moves as [task id, from, to]
+    # lists), end. trade_and_transfer writes one start ... end run per call, numbered from 1
+    def __init__(self, sink, level=LOADS, buffer_events=BUFFER_EVENTS):
+        self.level = level
+        self.buffer_events = buffer_events
+        self._callback = sink if callable(sink) else None
+        self._file = None
+        self._owned = False
+        if self._callback is None:
+            if isinstance(sink, str):
+                self._file = open(sink, 'w', encoding='utf-8')
+                self._owned = True
+            else:
+                self._file = sink
+        self._buffer = []
+        self.runs = 0
+        self.step = 0
+
+    def emit(self, event):
+        if self._callback is not None:
+            self._callback(event)
+            return
+        self._buffer.append(json.dumps(event, separators=(',', ':')))
+        if len(self._buffer) >= self.buffer_events:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            if self._owned:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self, stations):
+        self.runs += 1
+        self.step = 0
+        self.emit({'event': 'start', 'run': self.runs,
+                   'stations': [[task.id for task in station] for station in stations],
+                   'times': [[task.time for task in station] for station in stations]})
+
+    def candidate(self, kind, gain, moves):
+        self.emit({'event': 'candidate', 'run': self.runs, 'step': self.step + 1, 'kind': kind, 'gain': gain,
+                   'moves': moves})
+
+    def move(self, kind, moves, loads):
+        self.step += 1
+        event = {'event': 'move', 'run': self.runs, 'step': self.step, 'kind': kind, 'moves': moves}
+        if self.level >= LOADS:
+            event['loads'] = loads.tolist()
+        self.emit(event)
+
+    def undo(self, kind, moves, loads):
+        # a move taken back because it came after the best smoothing index, moves are those of the undone move
+        self.step += 1
+        event = {'event': 'undo', 'run': self.runs, 'step': self.step, 'kind': kind, 'moves': moves}
+        if self.level >= LOADS:
+            event['loads'] = loads.tolist()
+        self.emit(event)
+
+    def end(self, reason, iterations, smoothing_index, loads):
+        self.emit({'event': 'end', 'run': self.runs, 'reason': reason, 'iterations': iterations,
+                   'smoothing_index': smoothing_index, 'loads': loads.tolist()})
+        if self._file is not None:
+            self.flush()
+
+
+def print_moves(event):
+    # MoveTrace callback that prints the executed moves, the verbose output of trade_and_transfer
+    if event['event'] != 'move':
+        return
+    moves = event['moves']
+    if event['kind'] == 'transfer':
+        print("EXECUTE: transfer", moves[0][0], "from", moves[0][1], "to", moves[0][2])
+    else:
+        print("EXECUTE: trade", moves[0][0], "in", moves[0][1], "and", moves[1][0], "in", moves[1][1])
+
+
+def read_trace(trace_file):
+    # the events of a JSONL trace file, blank lines skipped
+    with open(trace_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay(events):
+    # Rebuild the assignments of a trace: yields (event, stations) for the start of every run, after every
+    # move and undo and at its end, stations as lists of task ids. The loads recorded in the trace are checked
+    # against the rebuilt ones, a mismatch raises ValueError
+    station_of = times = None
+    count = 0
+    for event in events:
+        if event['event'] == 'start':
+            station_of, times = {}, {}
+            for j, (ids, task_times) in enumerate(zip(event['stations'], event['times']), 1):
+                for task_id, task_time in zip(ids, task_times):
+                    station_of[task_id] = j
+                    times[task_id] = task_time
+            count = len(event['stations'])
+        elif event['event'] in ('move', 'undo'):
+            if station_of is None:
+                raise ValueError("Step {} of run {} comes before the start of the run".format(
+                    event['step'], event['run']))
+            moves = event['moves']
+            if event['event'] == 'undo':
+                moves = [[task_id, to, source] for task_id, source, to in moves]
+            for task_id, source, to in moves:
+                if station_of.get(task_id) != source:
+                    raise ValueError("Step {} of run {} moves task {} from station {}, it is at station {}".format(
+                        event['step'], event['run'], task_id, source, station_of.get(task_id)))
+                station_of[task_id] = to
+            count = max(count, max(to for _, _, to in moves))
+        elif event['event'] != 'end' or station_of is None:
+            continue
+
+        if 'loads' in event:
+            count = len(event['loads'])
+        stations = [[] for _ in range(count)]
+        for task_id, j in station_of.items():
+            stations[j - 1].append(task_id)
+        if 'loads' in event:
+            loads = [sum(times[task_id] for task_id in station) for station in stations]
+            if loads != event['loads']:
+                raise ValueError("Step {} of run {} recorded the loads {}, the replay gives {}".format(
+                    event.get('step', 0), event['run'], event['loads'], loads))
+        yield event, stations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a trade and transfer trace into its assignments")
+    parser.add_argument('trace_file')
+    parser.add_argument('--run', type=int, help="only this run of the trace")
+    parser.add_argument('--step', type=int, help="print the assignment after this step only")
+    args = parser.parse_args()
+
+    for event, stations in replay(read_trace(args.trace_file)):
+        if args.run is not None and event['run'] != args.run:
+            continue
+        step = event.get('step', 0) if event['event'] != 'end' else None
+        if args.step is not None and step != args.step:
+            continue
+        if event['event'] == 'start':
+            print("Run", event['run'], "starts with", len(stations), "stations")
+        elif event['event'] == 'end':
+            print("Run", event['run'], "ends:", event['reason'], "after", event['iterations'], "moves, SI",
+                  round(event['smoothing_index'], 4))
+        else:
+            print("Step", step, event['event'], event['kind'],
+                  ", ".join("task {} {} -> {}".format(*move) for move in event['moves']))
+        if args.step is not None or event['event'] == 'end':
+            for index, station in enumerate(stations):
+                print("Station", index + 1, "operates Task", station)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# Multi-start randomized Moodie Young Method: many seeded runs on a process pool, best one kept
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lower_bounds import station_lower_bound
+from metrics import batch_metrics, stack_loads
+from mym_solver import MoodieYoungSolver
+from problem_instance import load_instance
+
+# solver of the worker process, set once per worker so the instance is sent to each worker a single time
+_worker_solver = None
+
+
+def _init_worker(instance):
+    global _worker_solver
+    _worker_solver = MoodieYoungSolver(instance)
+
+
+def _run_start(solver, beat, rule, seed):
+    # one randomized assignment plus trade and transfer, reduced to what is needed to rank it: its station loads
+    solution = solver.solve(beat, rule, seed)
+    return solution.stations.loads.tolist(), seed
+
+
+def _run_worker_start(args):
+    return _run_start(_worker_solver, *args)
+
+
+class MultiStartResult:
+    def __init__(self, best, runs, lower_bound=None):
+        # best is the MYMSolution of the best run, runs holds (station_count, smoothing_index, seed) of every run
+        # that was made. lower_bound is the station lower bound the run was checked against, if any
+        self.best = best
+        self.runs = runs
+        self.lower_bound = lower_bound
+
+    @property
+    def stopped_at_bound(self):
+        return self.lower_bound is not None and self.best.station_count <= self.lower_bound
+
+    @property
+    def seed(self):
+        return self.best.seed
+
+
+def _collect_runs(results, lower_bound):
+    # take (loads, seed) runs until one reaches the station lower bound, no later start can use fewer stations
+    runs = []
+    for run in results:
+        runs.append(run)
+        if lower_bound is not None and len(run[0]) <= lower_bound:
+            break
+    return runs
+
+
+def run_multi_start(instance, beat, starts, rule='random', base_seed=0, workers=None, stop_at_bound=True):
+    # Run the seeds base_seed .. base_seed + starts - 1 and keep the solution with the fewest stations, then the
+    # lowest smoothing index (then the lowest seed). Workers only return the station loads, which batch_metrics
+    # ranks all at once; the winning seed is solved once more in this process to get its assignment, which is
+    # cheaper than shipping every line back. With stop_at_bound the starts stop as soon as one run uses as few
+    # stations as the lower bound
+    lower_bound = station_lower_bound(instance, beat) if stop_at_bound else None
+    workers = workers or os.cpu_count() or 1
+    jobs = [(beat, rule, seed) for seed in range(base_seed, base_seed + starts)]
+    if workers == 1:
+        solver = MoodieYoungSolver(instance)
+        starts = _collect_runs((_run_start(solver, *job) for job in jobs), lower_bound)
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(instance,))
+        try:
+            chunksize = max(1, min(len(jobs) // (4 * workers), 64))
+            starts = _collect_runs(executor.map(_run_worker_start, jobs, chunksize=chunksize), lower_bound)
+        finally:
+            executor.shutdown(cancel_futures=True)
+    # seeds go up with the start, so the ranking's tie-break on the first line is the lowest seed
+    metrics = batch_metrics(*stack_loads([loads for loads, _ in starts]))
+    runs = [(count, smoothing_index, seed) for count, smoothing_index, (_, seed)
+            in zip(metrics.station_counts.tolist(), metrics.smoothing_index.tolist(), starts)]
+    best_seed = runs[int(metrics.ranking()[0])][2]
+    return MultiStartResult(MoodieYoungSolver(instance).solve(beat, rule, best_seed), runs, lower_bound)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-start randomized MYM, keeps the best of all starts")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--beat', type=int, default=54)
+    parser.add_argument('--starts', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first start")
+    parser.add_argument('--workers', type=int, help="worker processes, all cores by default")
+    parser.add_argument('--all-starts', action='store_true', help="do not stop when a start reaches the lower bound")
+    args = parser.parse_args()
+
+    instance = load_instance(args.csv_file, cache=args.cache)
+    result = run_multi_start(instance, args.beat, args.starts, base_seed=args.seed, workers=args.workers,
+                             stop_at_bound=not args.all_starts)
+    best = result.best
+    print("Best of", len(result.runs), "starts: seed", result.seed)
+    if result.lower_bound is not None:
+        print("Lower bound of the number of stations is", result.lower_bound,
+              "(reached, stopped early)" if result.stopped_at_bound else "")
+    print("The number of stations is", best.station_count)
+    for index, station in enumerate(best.stations):
+        print("Station", index + 1, "operates Task", [task.id for task in station])
+    print("The time of each station is", best.stations.loads.tolist())
+    print("Balance Rate eta =", best.balance_rate)
+    print("Smoothing Index SI =", best.smoothing_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Moodie Young Method with a pluggable priority rule for the work elements assignment stage
+import argparse
+import random
+from contextlib import nullcontext
+
+import profiling
+from assignment_engine import assign_elements
+from lower_bounds import station_lower_bound
+from metrics import calculate_balance_rate, calculate_smoothing_index
+from move_scoring import AllPairsMoveFinder, PairMoveFinder
+from move_trace import LEVELS, MoveTrace
+from problem_instance import load_instance
+from trade_transfer import MoveFinder, TradeTransferLimits, trade_and_transfer
+
+# A priority rule is called as rule(instance, rng) and returns one key per task (in instance.tasks order).
+# Among the ready tasks the one with the smallest key is assigned first, ties go to the task listed first
+PRIORITY_RULES = {}
+
+# move selection of the trade and transfer stage: the incremental and the vectorized heaviest / lightest station
+# search pick the same moves, all_pairs searches every station pair
+NEIGHBOURHOODS = {'max_min': MoveFinder, 'max_min_vectorized': PairMoveFinder, 'all_pairs': AllPairsMoveFinder}
+
+
+def priority_rule(name):
+    # register a priority rule under name
+    def register(rule):
+        PRIORITY_RULES[name] = rule
+        return rule
+
+    return register
+
+
+@priority_rule('max_time')
+def maximum_task_time(instance, rng):
+    # classic MYM, the longest task first
+    return [-task.time for task in instance.tasks]
+
+
+@priority_rule('min_time')
+def minimum_task_time(instance, rng):
+    return [task.time for task in instance.tasks]
+
+
+@priority_rule('most_successors')
+def most_successors(instance, rng):
+    # the task with the most immediate successors first
+    return [-len(task.successors) for task in instance.tasks]
+
+
+@priority_rule('rpw')
+def ranked_positional_weight(instance, rng):
+    return (-instance.weights.rpw).tolist()
+
+
+@priority_rule('random')
+def random_priority(instance, rng):
+    # a random position for every task
+    keys = list(range(len(instance.tasks)))
+    rng.shuffle(keys)
+    return keys
+
+
+def resolve_priority_rule(rule):
+    # rule is the name of a registered rule or a callable with the same signature
+    if callable(rule):
+        return getattr(rule, '__name__', 'custom'), rule
+    if rule not in PRIORITY_RULES:
+        raise ValueError("Unknown priority rule {}, expected one of {}".format(rule, sorted(PRIORITY_RULES)))
+    return rule, PRIORITY_RULES[rule]
+
+
+class MYMSolution:
+    def __init__(self, stations, rule, seed=None, trade_result=None):
+        # trade_result is the TradeTransferResult of the trade and transfer stage, None when it was skipped
+        self.stations = stations
+        self.rule = rule
+        self.seed = seed
+        self.trade_result = trade_result
+
+    @property
+    def station_count(self):
+        return len(self.stations)
+
+    @property
+    def balance_rate(self):
+        return float(calculate_balance_rate(self.stations))
+
+    @property
+    def smoothing_index(self):
+        return float(calculate_smoothing_index(self.stations))
+
+
+class MoodieYoungSolver:
+    # Solves one loaded instance. The graph, closure and weights of the instance are computed once and reused by
+    # every call, so comparing rules costs one parse plus one assignment (and trade and transfer) pass per rule
+    def __init__(self, instance):
+        self.instance = instance
+
+    def solve(self, beat, rule='max_time', seed=None, trade=True, verbose=False, after_move=None, station_limit=None,
+              limits=None, neighbourhood='max_min', trace=None):
+        # with station_limit, None is returned as soon as the assignment needs more stations than that.
+        # limits (TradeTransferLimits) bounds the trade and transfer stage, neighbourhood names its move search
+        # and trace (a MoveTrace) records its moves
+        name, rule = resolve_priority_rule(rule)
+        keys = rule(self.instance, random.Random(seed))
+        stations = assign_elements(self.instance.tasks, self.instance.graph, beat, keys, station_limit)
+        if stations is None:
+            return None
+        trade_result = None
+        if trade:
+            trade_result = trade_and_transfer(stations, verbose, after_move, limits,
+                                              NEIGHBOURHOODS[neighbourhood], trace)
+        return MYMSolution(stations, name, seed, trade_result)
+
+    def compare_rules(self, beat, rules=None, seed=None, limits=None, neighbourhood='max_min', trace=None):
+        # with trace, run k of the trace is the trade and transfer stage of the k-th rule
+        return [self.solve(beat, rule, seed, limits=limits, neighbourhood=neighbourhood, trace=trace)
+                for rule in (rules or list(PRIORITY_RULES))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MYM priority rules on one instance")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--beat', type=int, default=54)
+    parser.add_argument('--rules', nargs='+', choices=sorted(PRIORITY_RULES))
+    parser.add_argument('--seed', type=int, help="seed of the random rule")
+    parser.add_argument('--max-iterations', type=int, help="limit of trade and transfer moves")
+    parser.add_argument('--time-limit', type=float, help="seconds of trade and transfer per rule")
+    parser.add_argument('--no-improvement', type=int, help="stop after this many moves without a lower SI")
+    parser.add_argument('--neighbourhood', default='max_min', choices=sorted(NEIGHBOURHOODS),
+                        help="move search of the trade and transfer stage")
+    parser.add_argument('--profile', metavar='JSON_FILE', help="write counters and phase times to this file")
+    parser.add_argument('--trace', metavar='JSONL_FILE', help="write the trade and transfer moves to this file")
+    parser.add_argument('--trace-level', default='loads', choices=sorted(LEVELS, key=LEVELS.get),
+                        help="moves only, also the loads after every move, also the move candidates")
+    args = parser.parse_args()
+
+    limits = TradeTransferLimits(args.max_iterations, args.time_limit, args.no_improvement)
+    with profiling.profiling() if args.profile else nullcontext() as profile, \
+            MoveTrace(args.trace, LEVELS[args.trace_level]) if args.trace else nullcontext() as trace:
+        solver = MoodieYoungSolver(load_instance(args.csv_file, cache=args.cache))
+        print("Lower bound of the number of stations is", station_lower_bound(solver.instance, args.beat))
+        print("{:<16}{:>10}{:>14}{:>14}".format("rule", "stations", "eta", "SI"))
+        for solution in solver.compare_rules(args.beat, args.rules, args.seed, limits, args.neighbourhood, trace):
+            print("{:<16}{:>10}{:>14.4f}{:>14.4f}".format(solution.rule, solution.station_count,
+                                                         solution.balance_rate, solution.smoothing_index))
+    if profile is not None:
+        profile.to_json(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Ranked positional weights and the related tie-breaking weights, computed in one pass over the closure
+import numpy as np
+
+# a closure block with fewer set bits than one in SPARSE_BLOCK entries is summed over its set bits instead of
+# being expanded into a dense matrix
+SPARSE_BLOCK = 32
+
+
+class PositionalWeights:
+    def __init__(self, closure, block_elements=1 << 22):
+        # rpw is the closure matrix times the time vector (time of task i plus all its descendants),
+        # head_time is the time vector times the closure matrix (time of task i plus all its ancestors).
+        # The bitsets are taken in blocks of about block_elements bits, in topological positions. A block with
+        # fewer than one set bit in SPARSE_BLOCK bits is summed over its set bits (TransitiveClosure.position_pairs),
+        # a denser one is expanded into matrix rows only as wide as the reach of the block and multiplied. So the
+        # work follows the size of the closure, n^2 only when the closure itself is about that dense
+        graph = closure.graph
+        order = closure.order
+        times = graph.times[order].astype(np.float64)
+        rpw = np.empty(graph.n, dtype=np.float64)
+        head_time = np.zeros(graph.n, dtype=np.float64)
+        # bits[p] and set_bits[p] count the bits and the set bits of the bitsets before position p, farthest[p] is
+        # the end of the reach of the positions up to p
+        ends = closure.reach_ends()
+        bits = np.zeros(graph.n + 1, dtype=np.int64)
+        bits[1:] = np.cumsum(ends - np.arange(graph.n))
+        set_bits = np.zeros(graph.n + 1, dtype=np.int64)
+        set_bits[1:] = np.cumsum(closure.counts()[order] + 1)
+        farthest = np.maximum.accumulate(ends) if graph.n else ends
+        start = 0
+        while start < graph.n:
+            stop = int(np.searchsorted(bits, bits[start] + block_elements, side='right')) - 1
+            stop = min(max(stop, start + 1), graph.n)
+            if (set_bits[stop] - set_bits[start]) * SPARSE_BLOCK < bits[stop] - bits[start]:
+                width = farthest[stop - 1] - start
+                rows, columns = closure.position_pairs(start, stop)
+                rpw[start:stop] = np.bincount(rows, weights=times[start + columns], minlength=stop - start)
+                head_time[start:start + width] += np.bincount(columns, weights=times[start + rows], minlength=width)
+            else:
+                while stop - start > 1 and (stop - start) * (farthest[stop - 1] - start) > block_elements:
+                    stop = start + (stop - start) // 2
+                width = farthest[stop - 1] - start
+                block = closure.position_rows(start, stop, width).astype(np.float64)
+                rpw[start:stop] = block @ times[start:start + width]
+                head_time[start:start + width] += times[start:stop] @ block
+            start = stop
+
+        self.graph = graph
+        self.rpw = np.empty(graph.n, dtype=np.int64)
+        self.rpw[order] = np.rint(rpw)
+        self.head_time = np.empty(graph.n, dtype=np.int64)
+        self.head_time[order] = np.rint(head_time)
+        self.successor_count = closure.counts()
+        self.immediate_successor_count = graph.out_degrees()
+
+    def earliest_station(self, beat):
+        # lowest station number (1-based) task i can go to: its ancestors and itself need ceil(head_time / beat) stations
+        return -(-self.head_time // beat)
+
+    def latest_station(self, beat, station_count):
+        # highest station number (1-based) task i can go to on a line of station_count stations
+        return station_count + 1 - (-(-self.rpw // beat))
+
+    def rpw_of(self, task_id):
+        return int(self.rpw[self.graph.index[task_id]])
+
+
+def compute_positional_weights(closure):
+    return PositionalWeights(closure)
@@ -0,0 +1,129 @@
+# Indexed precedence graph shared by the RPW and MYM scripts
+from collections import deque
+
+import numpy as np
+
+
+def to_csr(adjacency):
+    # pack a list of adjacency lists into CSR-style (indptr, indices) NumPy arrays
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(neighbours) for neighbours in adjacency])
+    indices = np.fromiter((k for neighbours in adjacency for k in neighbours), dtype=np.int64, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def _split(indptr, indices):
+    # CSR arrays back into a list of adjacency lists
+    bounds = indptr.tolist()
+    values = indices.tolist()
+    return [values[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+class PrecedenceGraph:
+    def __init__(self, ids, times, predecessors):
+        # ids, times and predecessors (lists of predecessor ids) are given per task, in file order.
+        # Tasks are addressed by their position in that order (the task index) everywhere inside the graph
+        self.ids = list(ids)
+        self.n = len(self.ids)
+        self.index = {}
+        for i, task_id in enumerate(self.ids):
+            if task_id in self.index:
+                raise ValueError("Duplicate task id {}".format(task_id))
+            self.index[task_id] = i
+        self.times = np.asarray(times, dtype=np.int64)
+
+        # predecessors[i] and successors[i] are lists of task indices, successors keep file order.
+        # seen[k] == i marks k as already listed for task i, so a repeated predecessor is dropped in O(1)
+        self._predecessors = []
+        self._successors = [[] for _ in range(self.n)]
+        seen = [-1] * self.n
+        for i, predecessor_ids in enumerate(predecessors):
+            predecessor_index = []
+            for predecessor_id in predecessor_ids:
+                k = self.index.get(predecessor_id)
+                if k is None:
+                    raise ValueError("Task {} has unknown predecessor {}".format(self.ids[i], predecessor_id))
+                if seen[k] != i:
+                    seen[k] = i
+                    predecessor_index.append(k)
+                    self._successors[k].append(i)
+            self._predecessors.append(predecessor_index)
+
+        self.pred_indptr, self.pred_indices = to_csr(self._predecessors)
+        self.succ_indptr, self.succ_indices = to_csr(self._successors)
+        self.edge_count = len(self.succ_indices)
+        self._topological_order = None
+
+    @classmethod
+    def from_tasks(cls, tasks):
+        return cls([task.id for task in tasks], [task.time for task in tasks], [task.predecessors for task in tasks])
+
+    @classmethod
+    def from_csr(cls, ids, times, pred_indptr, pred_indices):
+        # rebuild a graph that was already checked (a parsed task table or a compiled instance) from its
+        # predecessor CSR arrays. The successor CSR comes from one stable sort of the edges, so successors keep
+        # file order like in __init__. The adjacency lists are only split out of the CSR arrays on first use
+        graph = cls.__new__(cls)
+        graph.ids = list(ids)
+        graph.n = len(graph.ids)
+        graph.index = dict(zip(graph.ids, range(graph.n)))
+        graph.times = np.asarray(times, dtype=np.int64)
+        graph.pred_indptr = np.asarray(pred_indptr, dtype=np.int64)
+        graph.pred_indices = np.asarray(pred_indices, dtype=np.int64)
+        tasks_of_edges = np.repeat(np.arange(graph.n, dtype=np.int64), np.diff(graph.pred_indptr))
+        order = np.argsort(graph.pred_indices, kind='stable')
+        graph.succ_indices = tasks_of_edges[order]
+        graph.succ_indptr = np.zeros(graph.n + 1, dtype=np.int64)
+        graph.succ_indptr[1:] = np.cumsum(np.bincount(graph.pred_indices, minlength=graph.n))
+        graph._predecessors = graph._successors = None
+        graph.edge_count = len(graph.succ_indices)
+        graph._topological_order = None
+        return graph
+
+    @property
+    def predecessors(self):
+        if self._predecessors is None:
+            self._predecessors = _split(self.pred_indptr, self.pred_indices)
+        return self._predecessors
+
+    @property
+    def successors(self):
+        if self._successors is None:
+            self._successors = _split(self.succ_indptr, self.succ_indices)
+        return self._successors
+
+    def in_degrees(self):
+        return np.diff(self.pred_indptr)
+
+    def out_degrees(self):
+        return np.diff(self.succ_indptr)
+
+    def successor_ids(self, i):
+        return [self.ids[k] for k in self.successors[i]]
+
+    def predecessor_ids(self, i):
+        return [self.ids[k] for k in self.predecessors[i]]
+
+    def topological_order(self):
+        # Kahn's algorithm, ready tasks are taken in file order. The order is computed once and cached
+        if self._topological_order is None:
+            in_degrees = self.in_degrees().tolist()
+            ready = deque(i for i in range(self.n) if in_degrees[i] == 0)
+            order = []
+            while ready:
+                i = ready.popleft()
+                order.append(i)
+                for k in self.successors[i]:
+                    in_degrees[k] -= 1
+                    if in_degrees[k] == 0:
+                        ready.append(k)
+            if len(order) < self.n:
+                cyclic_ids = [self.ids[i] for i in range(self.n) if in_degrees[i] > 0]
+                raise ValueError("Precedence graph has a cycle through tasks {}".format(cyclic_ids))
+            self._topological_order = np.array(order, dtype=np.int64)
+        return self._topological_order
+
+
+def build_graph(tasks):
+    # build the precedence graph of tasks once, in O(n+e)
+    return PrecedenceGraph.from_tasks(tasks)
@@ -0,0 +1,145 @@
+# Tasks of one balancing problem, loaded once and shared by RPW, every MYM rule and the other solvers
+import numpy as np
+
+import profiling
+from instance_cache import compiled_path, file_digest, read_compiled, write_compiled
+from positional_weights import compute_positional_weights
+from precedence_graph import PrecedenceGraph, build_graph
+from task_loader import read_task_table
+from transitive_closure import TransitiveClosure
+
+
+class Task:
+    # slots: a million task file holds a million of these
+    __slots__ = ('id', 'name', 'time', 'predecessors', 'successors', 'chain_successors', 'rpw')
+
+    def __init__(self, id, name, time, predecessors=None, successors=None, chain_successors=None, rpw=None):
+        self.id = id
+        self.name = name
+        self.time = time
+        self.predecessors = predecessors
+        self.successors = successors
+        self.chain_successors = chain_successors
+        self.rpw = rpw
+
+
+def read_tasks_from_csv(csv_file):
+    # read csv，set id, name, time, predecessors of every single task, generate tasks.
+    # The file is streamed and validated by read_task_table, errors are raised as a TaskFileError with line numbers
+    table = read_task_table(csv_file)
+    ids = table.ids.tolist()
+    times = table.times.tolist()
+    return [Task(task_id, name, task_time, predecessors)
+            for task_id, name, task_time, predecessors in zip(ids, table.names(), times, table.predecessor_ids())]
+
+
+def _id_lists(ids, indptr, indices):
+    # CSR arrays of task indices as lists of task ids, holding the same int objects as ids
+    values = [ids[k] for k in indices.tolist()]
+    bounds = indptr.tolist()
+    return [values[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def find_successors(non_successors_tasks, graph):
+    # set the successors of every task in tasks from the precedence graph
+    successor_ids = _id_lists(graph.ids, graph.succ_indptr, graph.succ_indices)
+    for object_task, successors in zip(non_successors_tasks, successor_ids):
+        object_task.successors = successors
+
+
+def find_chain_successors(with_successors_tasks, closure):
+    # set chain successors of every task in tasks（including self）from the transitive closure
+    for i, object_task in enumerate(with_successors_tasks):
+        object_task.chain_successors = closure.chain_successor_ids(i)
+
+
+def write_rpw(with_chain_successors_tasks, weights):
+    # set rpw of every task in tasks from the positional weights
+    for i, object_task in enumerate(with_chain_successors_tasks):
+        object_task.rpw = int(weights.rpw[i])
+
+
+class ProblemInstance:
+    # The graph is built when the instance is created, the closure and the positional weights on first use.
+    # All of them are kept, so any number of solver runs on the same instance pay for them only once.
+    # graph, closure and weights may also be given when they are already known (a compiled instance), task.rpw
+    # is still only filled in on first use of weights. task.chain_successors (O(n^2) ids over all tasks, read by
+    # no solver) is only filled in by write_chain_successors
+    def __init__(self, tasks, graph=None, closure=None, weights=None):
+        self.tasks = tasks
+        self.graph = build_graph(tasks) if graph is None else graph
+        find_successors(tasks, self.graph)
+        self._closure = closure
+        self._weights = weights
+        self._rpw_written = False
+
+    @property
+    def closure(self):
+        if self._closure is None:
+            with profiling.phase('closure'):
+                self._closure = TransitiveClosure(self.graph)
+        return self._closure
+
+    def compute_weights(self):
+        # the positional weights, without writing task.rpw
+        if self._weights is None:
+            closure = self.closure
+            with profiling.phase('weights'):
+                self._weights = compute_positional_weights(closure)
+        return self._weights
+
+    @property
+    def weights(self):
+        weights = self.compute_weights()
+        if not self._rpw_written:
+            write_rpw(self.tasks, weights)
+            self._rpw_written = True
+        return weights
+
+    def write_chain_successors(self):
+        with profiling.phase('chain_successors'):
+            find_chain_successors(self.tasks, self.closure)
+
+    @property
+    def total_time(self):
+        return int(self.graph.times.sum())
+
+
+def instance_from_table(table):
+    # ProblemInstance from a validated TaskTable (see task_loader.read_task_table). The graph is built from the
+    # edge arrays of the table, the ids are not looked up task by task
+    pred_indptr = np.zeros(len(table) + 1, dtype=np.int64)
+    pred_indptr[1:] = np.cumsum(np.bincount(table.edge_tasks, minlength=len(table)))
+    graph = PrecedenceGraph.from_csr(table.ids.tolist(), table.times, pred_indptr, table.predecessor_rows())
+    tasks = [Task(task_id, name, task_time, predecessors) for task_id, name, task_time, predecessors
+             in zip(graph.ids, table.names(), graph.times.tolist(),
+                    _id_lists(graph.ids, graph.pred_indptr, graph.pred_indices))]
+    return ProblemInstance(tasks, graph)
+
+
+def instance_from_compiled(compiled):
+    # ProblemInstance from the arrays of a compiled file (see instance_cache.read_compiled), the file is not parsed
+    # or validated again. Closure and weights are computed on first use like for any other instance
+    graph = PrecedenceGraph.from_csr(compiled['ids'].tolist(), compiled['times'], compiled['pred_indptr'],
+                                     compiled['pred_indices'])
+    tasks = [Task(task_id, name, task_time, predecessors) for task_id, name, task_time, predecessors
+             in zip(graph.ids, compiled['names'], graph.times.tolist(),
+                    _id_lists(graph.ids, graph.pred_indptr, graph.pred_indices))]
+    return ProblemInstance(tasks, graph)
+
+
+@profiling.timed('load')
+def load_instance(csv_file, cache=False):
+    # With cache the parsed tasks are compiled once into csv_file + '.compiled.npz' and later runs load that file
+    # instead, as long as the content of csv_file is unchanged (it is checked by its SHA-256). Off by default,
+    # the command line tools turn it on with --cache
+    if not cache:
+        return instance_from_table(read_task_table(csv_file))
+    path = compiled_path(csv_file)
+    digest = file_digest(csv_file)
+    compiled = read_compiled(path, digest)
+    if compiled is not None:
+        return instance_from_compiled(compiled)
+    instance = instance_from_table(read_task_table(csv_file))
+    write_compiled(path, digest, instance)
+    return instance
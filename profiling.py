@@ -0,0 +1,82 @@
+# Optional counters and phase timers on the solver hot paths, recorded only while a Profile is active
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+# The Profile that records, None while profiling is off. Instrumented code reads it once per call and only
+# counts when it is set, so a disabled profile costs a None check per instrumented point
+active = None
+
+
+class Profile:
+    # counters[name] is a number of events, timers[name] the wall seconds spent in a phase and calls[name] how
+    # often the phase was entered. A phase entered inside itself (recursion) is only timed at the outer level
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.calls = {}
+        self._running = set()
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def to_dict(self):
+        return {'counters': dict(sorted(self.counters.items())),
+                'timers': {name: {'seconds': self.timers[name], 'calls': self.calls[name]}
+                           for name in sorted(self.timers)}}
+
+    def to_json(self, path=None):
+        # the profile as JSON text, also written to path when given
+        text = json.dumps(self.to_dict(), indent=1)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+        return text
+
+
+@contextmanager
+def profiling(profile=None):
+    # record into profile (a new Profile by default) for the duration of the block, the previous one is restored
+    global active
+    previous = active
+    active = profile or Profile()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+@contextmanager
+def phase(name):
+    # time the block as phase name of the active profile
+    profile = active
+    if profile is None or name in profile._running:
+        yield
+        return
+    profile._running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._running.discard(name)
+        profile.add_time(name, time.perf_counter() - start)
+
+
+def timed(name):
+    # decorator: time every call of the function as phase name, a plain call while profiling is off
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return function(*args, **kwargs)
+            with phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
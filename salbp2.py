@@ -0,0 +1,89 @@
+# SALBP-2: the shortest beat (cycle time) for a fixed number of stations
+import argparse
+
+from lower_bounds import station_lower_bound
+from mym_solver import MoodieYoungSolver
+from problem_instance import load_instance
+
+
+class Salbp2Result:
+    def __init__(self, beat, solution, probes, lower_beat):
+        # beat is the shortest beat the heuristics fit into the stations, solution the MYMSolution for it
+        # (after trade and transfer its longest station may even be shorter), lower_beat a lower bound on any beat
+        self.beat = beat
+        self.solution = solution
+        self.probes = probes
+        self.lower_beat = lower_beat
+
+    @property
+    def cycle_time(self):
+        # the actual cycle time of the line, the time of its longest station
+        return int(self.solution.stations.loads.max())
+
+
+def minimum_beat(instance, station_count, rules=('max_time', 'rpw', 'most_successors'), seed=None):
+    # Binary search of the beat between max(longest task, ceil(total time / station_count)) and the total time.
+    # A probe first checks the station lower bounds, which reject most short beats without any assignment, then
+    # tries the rules one after the other and stops each assignment as soon as it needs more than station_count
+    # stations. The answer takes O(log total time) probes. The bounds only grow as the beat shrinks, so a beat
+    # rejected by them also raises the proven lower bound of the beat
+    if station_count < 1:
+        raise ValueError("The number of stations must be at least 1, got {}".format(station_count))
+    times = instance.graph.times
+    total_time = int(times.sum())
+    low = max(int(times.max()), -(-total_time // station_count))
+    high = total_time
+    solver = MoodieYoungSolver(instance)
+    probes = 0
+
+    def probe(beat):
+        # the first rule that fits into the stations, False when the bounds already reject the beat
+        if station_lower_bound(instance, beat) > station_count:
+            return False
+        for rule in rules:
+            solution = solver.solve(beat, rule, seed, trade=False, station_limit=station_count)
+            if solution is not None:
+                return rule
+        return None
+
+    best_rule = probe(high)
+    probes += 1
+    lower_beat = low
+    while low < high:
+        beat = (low + high) // 2
+        probes += 1
+        rule = probe(beat)
+        if rule is False:
+            lower_beat = beat + 1
+        if not rule:
+            low = beat + 1
+        else:
+            high = beat
+            best_rule = rule
+    solution = solver.solve(high, best_rule, seed)
+    return Salbp2Result(high, solution, probes, lower_beat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shortest beat for a fixed number of stations (SALBP-2)")
+    parser.add_argument('csv_file', nargs='?', default='tasks.csv')
+    parser.add_argument('--cache', action='store_true',
+                        help="load through the compiled instance next to csv_file (csv_file + '.compiled.npz')")
+    parser.add_argument('--stations', type=int, required=True)
+    parser.add_argument('--seed', type=int, help="seed of the random rule, if used")
+    args = parser.parse_args()
+    if args.stations < 1:
+        parser.error("--stations must be at least 1")
+
+    result = minimum_beat(load_instance(args.csv_file, cache=args.cache), args.stations, seed=args.seed)
+    stations = result.solution.stations
+    print("The shortest beat for", args.stations, "stations is", result.beat,
+          "(lower bound {}, rule {}, {} probes)".format(result.lower_beat, result.solution.rule, result.probes))
+    for index, station in enumerate(stations):
+        print("Station", index + 1, "operates Task", [task.id for task in station])
+    print("The time of each station is", stations.loads.tolist())
+    print("The cycle time after trade and transfer is", result.cycle_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Reader and writer of the .IN2 task files of the standard SALBP benchmark data sets
+import numpy as np
+
+from instance_cache import pack_blobs
+from problem_instance import ProblemInstance, Task
+from task_loader import TaskFileError, TaskTable
+
+
+def _numbers(text):
+    # the integers of one line, separated by commas and / or white space
+    return [int(field) for field in text.replace(',', ' ').split()]
+
+
+def read_in2_table(in2_file):
+    # Read an .IN2 file (task count, one time per task, then one "i,j" precedence pair per line, i before j,
+    # closed by "-1,-1") into a TaskTable with task ids 1..n. Blank lines are skipped. Every format error, pair
+    # out of range and precedence cycle is raised in one TaskFileError with its file line
+    errors = []
+    with open(in2_file, 'r', encoding='utf-8') as file:
+        lines = [(number, line.strip()) for number, line in enumerate(file, 1) if line.strip()]
+    if not lines:
+        raise TaskFileError(in2_file, [(1, "empty file")])
+    try:
+        (count,) = _numbers(lines[0][1])
+    except ValueError:
+        raise TaskFileError(in2_file, [(lines[0][0], "expected the number of tasks, got {!r}".format(lines[0][1]))])
+
+    times, time_lines = [], []
+    for number, line in lines[1:count + 1]:
+        try:
+            (task_time,) = _numbers(line)
+            if task_time < 0:
+                errors.append((number, "task {} has a negative time {}".format(len(times) + 1, task_time)))
+        except ValueError:
+            errors.append((number, "expected the time of task {}, got {!r}".format(len(times) + 1, line)))
+            task_time = 0
+        times.append(task_time)
+        time_lines.append(number)
+    if len(times) < count:
+        errors.append((lines[-1][0], "expected {} task times, found {}".format(count, len(times))))
+
+    edge_tasks, edge_predecessors = [], []
+    closed = False
+    for number, line in lines[count + 1:]:
+        if closed:
+            errors.append((number, "text after the closing -1,-1"))
+            break
+        try:
+            predecessor, successor = _numbers(line)
+        except ValueError:
+            errors.append((number, "expected a precedence pair i,j, got {!r}".format(line)))
+            continue
+        if (predecessor, successor) == (-1, -1):
+            closed = True
+        elif not (1 <= predecessor <= count and 1 <= successor <= count):
+            errors.append((number, "precedence pair {},{} refers to a task outside 1..{}".format(
+                predecessor, successor, count)))
+        else:
+            edge_tasks.append(successor - 1)
+            edge_predecessors.append(predecessor)
+    if not closed:
+        errors.append((lines[-1][0], "missing the closing -1,-1"))
+    if errors:
+        raise TaskFileError(in2_file, sorted(errors))
+
+    # the table wants the edges grouped by task, in file order within a task
+    order = np.argsort(np.array(edge_tasks, dtype=np.int64), kind='stable')
+    name_data, name_offsets = pack_blobs([str(i).encode('utf-8') for i in range(1, count + 1)])
+    table = TaskTable(np.arange(1, count + 1, dtype=np.int64), name_data.tobytes(), name_offsets,
+                      np.array(times, dtype=np.int64), np.array(time_lines, dtype=np.int64),
+                      np.array(edge_tasks, dtype=np.int64)[order], np.array(edge_predecessors, dtype=np.int64)[order])
+    errors = table.validate()
+    if errors:
+        raise TaskFileError(in2_file, errors)
+    return table
+
+
+def read_in2_tasks(in2_file):
+    table = read_in2_table(in2_file)
+    return [Task(task_id, name, task_time, sorted(set(predecessors)))
+            for task_id, name, task_time, predecessors in zip(table.ids.tolist(), table.names(),
+                                                              table.times.tolist(), table.predecessor_ids())]
+
+
+def load_in2_instance(in2_file):
+    return ProblemInstance(read_in2_tasks(in2_file))
+
+
+def write_in2(tasks, in2_file):
+    # write tasks as an .IN2 file, tasks are numbered 1..n in list order
+    number = {task.id: i for i, task in enumerate(tasks, 1)}
+    with open(in2_file, 'w', encoding='utf-8') as file:
+        file.write("{}\n".format(len(tasks)))
+        for task in tasks:
+            file.write("{}\n".format(task.time))
+        for task in tasks:
+            for predecessor in task.predecessors:
+                file.write("{},{}\n".format(number[predecessor], number[task.id]))
+        file.write("-1,-1\n")
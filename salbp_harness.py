@@ -0,0 +1,144 @@
+# Runs every solver over a directory of .IN2 benchmark files in parallel and reports stations, gap and runtime
+import argparse
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from assignment_engine import fill_stations
+from branch_and_bound import solve_exact
+from genetic_algorithm import GeneticAlgorithm
+from local_search import LocalSearch
+from lower_bounds import station_lower_bound
+from mym_solver import PRIORITY_RULES, MoodieYoungSolver
+from salbp_format import load_in2_instance
+
+# file in the instance directory with the known optimal station counts: instance,cycle_time,stations
+OPTIMA_FILE = 'known_optima.csv'
+
+
+def _rpw_fill(instance, beat, time_limit, seed):
+    instance.weights
+    return len(fill_stations(instance.tasks, instance.graph, beat,
+                             sorted(instance.tasks, key=lambda task: task.rpw, reverse=True)))
+
+
+def _mym(rule):
+    def solve(instance, beat, time_limit, seed):
+        return MoodieYoungSolver(instance).solve(beat, rule, seed).station_count
+
+    return solve
+
+
+def _anneal(instance, beat, time_limit, seed):
+    start = MoodieYoungSolver(instance).solve(beat, 'max_time')
+    return LocalSearch(instance, beat).anneal(start, time_limit=time_limit, seed=seed).station_count
+
+
+def _genetic(instance, beat, time_limit, seed):
+    return GeneticAlgorithm(instance, beat, workers=1).run(time_limit=time_limit, seed=seed).station_count
+
+
+def _branch_and_bound(instance, beat, time_limit, seed):
+    return solve_exact(instance, beat, time_limit=time_limit).station_count
+
+
+# solver(instance, beat, time_limit, seed) -> station count. time_limit only bounds the searching solvers
+SOLVERS = {'rpw_fill': _rpw_fill}
+SOLVERS.update(('mym_' + rule, _mym(rule)) for rule in PRIORITY_RULES)
+SOLVERS.update(anneal=_anneal, genetic=_genetic, branch_and_bound=_branch_and_bound)
+
+
+def read_known_optima(directory):
+    # {(instance name, cycle time): optimal station count} from the OPTIMA_FILE of directory, if there is one
+    path = os.path.join(directory, OPTIMA_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', newline='', encoding='utf-8') as file:
+        return {(row['instance'], int(row['cycle_time'])): int(row['stations']) for row in csv.DictReader(file)}
+
+
+def find_instances(directory):
+    # every .IN2 file of directory (any case of the extension), sorted by name
+    return sorted(path for path in glob.glob(os.path.join(directory, '*')) if path.lower().endswith('.in2'))
+
+
+def instance_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# instances already loaded by this process, a worker reuses them for every job on the same file
+_loaded = {}
+
+
+def _run_job(job):
+    path, beat, solver, time_limit, seed, optimum = job
+    instance = _loaded.get(path)
+    if instance is None:
+        instance = _loaded[path] = load_in2_instance(path)
+    row = {'instance': instance_name(path), 'cycle_time': beat, 'solver': solver, 'stations': None,
+           'optimum': optimum, 'lower_bound': None, 'gap': None, 'seconds': None, 'error': None}
+    if beat < int(instance.graph.times.max()):
+        row['error'] = "cycle time below the longest task"
+        return row
+    row['lower_bound'] = station_lower_bound(instance, beat)
+    start = time.perf_counter()
+    row['stations'] = SOLVERS[solver](instance, beat, time_limit, seed)
+    row['seconds'] = time.perf_counter() - start
+    row['gap'] = row['stations'] - (optimum if optimum is not None else row['lower_bound'])
+    return row
+
+
+def run_harness(directory, beats=None, solvers=None, time_limit=1.0, seed=0, workers=None):
+    # One row per instance, cycle time and solver. The cycle times of an instance are those listed for it in the
+    # OPTIMA_FILE, plus beats. The gap is measured to the known optimum when there is one, else to the station
+    # lower bound. Jobs run on a process pool, largest instances first, and rows come back in job order
+    optima = read_known_optima(directory)
+    solvers = solvers or list(SOLVERS)
+    jobs = []
+    for path in find_instances(directory):
+        name = instance_name(path)
+        cycle_times = sorted({beat for known_name, beat in optima if known_name == name} | set(beats or []))
+        for beat in cycle_times:
+            for solver in solvers:
+                jobs.append((path, beat, solver, time_limit, seed, optima.get((name, beat))))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return [_run_job(job) for job in jobs]
+    order = sorted(range(len(jobs)), key=lambda k: -os.path.getsize(jobs[k][0]))
+    with ProcessPoolExecutor(workers) as executor:
+        rows = dict(zip(order, executor.map(_run_job, [jobs[k] for k in order])))
+    return [rows[k] for k in range(len(jobs))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the solvers over a directory of SALBP .IN2 files")
+    parser.add_argument('directory', nargs='?', default=os.path.join('fixtures', 'salbp'))
+    parser.add_argument('--beats', type=int, nargs='+', help="cycle times to run besides the known optima")
+    parser.add_argument('--solvers', nargs='+', choices=sorted(SOLVERS))
+    parser.add_argument('--time-limit', type=float, default=1.0, help="seconds per run of the searching solvers")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help="worker processes, all cores by default")
+    parser.add_argument('--output', help="also write the report to this CSV file")
+    args = parser.parse_args()
+
+    rows = run_harness(args.directory, args.beats, args.solvers, args.time_limit, args.seed, args.workers)
+    print("{:<16}{:>6}  {:<20}{:>9}{:>9}{:>6}{:>6}{:>10}".format(
+        "instance", "c", "solver", "stations", "optimum", "LB", "gap", "seconds"))
+    for row in rows:
+        if row['error']:
+            print("{:<16}{:>6}  {:<20}{}".format(row['instance'], row['cycle_time'], row['solver'], row['error']))
+            continue
+        print("{:<16}{:>6}  {:<20}{:>9}{:>9}{:>6}{:>6}{:>10.3f}".format(
+            row['instance'], row['cycle_time'], row['solver'], row['stations'],
+            "-" if row['optimum'] is None else row['optimum'], row['lower_bound'], row['gap'], row['seconds']))
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]) if rows else ['instance'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# Streaming, validating reader of task files into columnar arrays
+import csv
+from array import array
+from collections import deque
+from itertools import accumulate, islice
+
+import numpy as np
+
+# rows parsed per chunk before they are packed into arrays
+CHUNK_ROWS = 1 << 16
+# longest field csv.reader accepts, raised from its default of 128 KiB for rows with many thousand predecessors
+FIELD_SIZE_LIMIT = (1 << 31) - 1
+# errors listed in the message of a TaskFileError, all of them are kept in its errors attribute
+SHOWN_ERRORS = 20
+
+
+class TaskFileError(ValueError):
+    def __init__(self, csv_file, errors):
+        # errors is a list of (line number, message), sorted by line
+        self.csv_file = csv_file
+        self.errors = errors
+        lines = ["{}:{}: {}".format(csv_file, line, message) for line, message in errors[:SHOWN_ERRORS]]
+        if len(errors) > SHOWN_ERRORS:
+            lines.append("... and {} more errors".format(len(errors) - SHOWN_ERRORS))
+        super().__init__("{} errors in task file {}\n{}".format(len(errors), csv_file, "\n".join(lines)))
+
+
+class TaskTable:
+    # One task file as columns. ids, times and lines (the file line of each task) are int64 arrays in file order.
+    # The names are stored UTF-8 encoded back to back in name_data, the name of row r is
+    # name_data[name_offsets[r]:name_offsets[r + 1]]. The predecessors are one edge list: edge_tasks[e] is the row
+    # of a task and edge_predecessors[e] the id of one of its predecessors, grouped by row in file order
+    def __init__(self, ids, name_data, name_offsets, times, lines, edge_tasks, edge_predecessors):
+        self.ids = ids
+        self.name_data = name_data
+        self.name_offsets = name_offsets
+        self.times = times
+        self.lines = lines
+        self.edge_tasks = edge_tasks
+        self.edge_predecessors = edge_predecessors
+
+    def __len__(self):
+        return len(self.ids)
+
+    def name(self, row):
+        return self.name_data[self.name_offsets[row]:self.name_offsets[row + 1]].decode('utf-8')
+
+    def names(self):
+        offsets = self.name_offsets.tolist()
+        data = self.name_data
+        return [data[offsets[row]:offsets[row + 1]].decode('utf-8') for row in range(len(self))]
+
+    def predecessor_rows(self):
+        # row of every edge predecessor, -1 for an unknown id (the first row of a duplicated id otherwise)
+        if not len(self.ids):
+            return np.full(len(self.edge_predecessors), -1, dtype=np.int64)
+        order = np.argsort(self.ids, kind='stable')
+        sorted_ids = self.ids[order]
+        found = np.minimum(np.searchsorted(sorted_ids, self.edge_predecessors), len(sorted_ids) - 1)
+        return np.where(sorted_ids[found] == self.edge_predecessors, order[found], -1)
+
+    def validate(self):
+        # (line, message) of every duplicate id, unknown or own predecessor and task on a precedence cycle,
+        # in O(n log n + e)
+        errors = []
+        order = np.argsort(self.ids, kind='stable')
+        sorted_ids = self.ids[order]
+        repeated = np.flatnonzero(sorted_ids[1:] == sorted_ids[:-1]) + 1
+        first = np.searchsorted(sorted_ids, sorted_ids[repeated])
+        for row, first_row in zip(order[repeated].tolist(), order[first].tolist()):
+            errors.append((int(self.lines[row]), "duplicate task id {} (first defined on line {})".format(
+                self.ids[row], self.lines[first_row])))
+
+        predecessor_rows = self.predecessor_rows()
+        for e in np.flatnonzero(predecessor_rows < 0).tolist():
+            row = self.edge_tasks[e]
+            errors.append((int(self.lines[row]), "task {} has unknown predecessor {}".format(
+                self.ids[row], self.edge_predecessors[e])))
+        own = predecessor_rows == self.edge_tasks
+        for e in np.flatnonzero(own).tolist():
+            row = self.edge_tasks[e]
+            errors.append((int(self.lines[row]), "task {} is its own predecessor".format(self.ids[row])))
+
+        known = (predecessor_rows >= 0) & ~own
+        for row in _cycle_rows(len(self), predecessor_rows[known], self.edge_tasks[known]):
+            errors.append((int(self.lines[row]), "task {} is on a precedence cycle".format(self.ids[row])))
+        errors.sort()
+        return errors
+
+    def predecessor_ids(self):
+        # list of predecessor ids of every row
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(self.edge_tasks, minlength=len(self)))
+        predecessors = self.edge_predecessors.tolist()
+        bounds = indptr.tolist()
+        return [predecessors[bounds[row]:bounds[row + 1]] for row in range(len(self))]
+
+
+def _cycle_rows(n, sources, targets):
+    # Rows left after Kahn's algorithm removes every task with no unremoved predecessor and the same is done
+    # backwards for successors: the tasks on a cycle, or on a path between two cycles. O(n + e)
+    if (sources < targets).all():
+        # every predecessor comes earlier in the file, the usual layout: file order is topological
+        return []
+    remaining = np.ones(n, dtype=bool)
+    for forward in (True, False):
+        if not remaining.any():
+            break
+        tails, heads = (sources, targets) if forward else (targets, sources)
+        keep = remaining[tails] & remaining[heads]
+        tails, heads = tails[keep], heads[keep]
+        degrees = np.bincount(heads, minlength=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(tails, minlength=n))
+        # machine int arrays instead of lists, the lists of a million row file would hold their ints as objects
+        adjacency = array('q', heads[np.argsort(tails, kind='stable')].tobytes())
+        bounds = array('q', indptr.tobytes())
+        degrees = array('q', degrees.astype(np.int64).tobytes())
+        ready = deque(i for i in np.flatnonzero(remaining).tolist() if degrees[i] == 0)
+        while ready:
+            i = ready.popleft()
+            remaining[i] = False
+            for k in adjacency[bounds[i]:bounds[i + 1]]:
+                degrees[k] -= 1
+                if degrees[k] == 0:
+                    ready.append(k)
+    return np.flatnonzero(remaining).tolist()
+
+
+def _parse_int(text):
+    try:
+        return int(text), None
+    except ValueError:
+        return None, "{!r} is not an integer".format(text.strip())
+
+
+def _regular_rows(rows, lines, errors):
+    # the rows of a chunk that are not all of 4 columns: blank rows are dropped, rows of 3 columns get an empty
+    # predecessor field and rows of any other width are reported
+    regular, regular_lines = [], []
+    for row, line in zip(rows, lines):
+        if not row or not any(field.strip() for field in row):
+            continue
+        if len(row) == 3:
+            row = row + ['']
+        elif len(row) != 4:
+            errors.append((line, "expected 4 columns (ID,Name,Time,Predecessors), got {}".format(len(row))))
+            continue
+        regular.append(row)
+        regular_lines.append(line)
+    return regular, regular_lines
+
+
+def _parse_rows(rows, lines, errors):
+    # the slow path of one chunk: every field of every row parsed on its own, so that each bad field is reported
+    # with its line. Returns the columns of the good rows like _parse_chunk
+    ids, names, times, predecessor_lists = [], [], [], []
+    for row, line in zip(rows, lines):
+        if not any(field.strip() for field in row):
+            continue
+        task_id, id_error = _parse_int(row[0])
+        task_time, time_error = _parse_int(row[2])
+        row_errors = [message for message in (id_error and "task id " + id_error,
+                                              time_error and "task time " + time_error) if message]
+        if task_time is not None and task_time < 0:
+            row_errors.append("task {} has a negative time {}".format(task_id, task_time))
+        predecessors = []
+        for field in (row[3].split(';') if row[3].strip() else []):
+            predecessor, error = _parse_int(field)
+            if error:
+                row_errors.append("predecessor " + error)
+            else:
+                predecessors.append(predecessor)
+        if row_errors:
+            errors.extend((line, message) for message in row_errors)
+            continue
+        ids.append(task_id)
+        names.append(row[1])
+        times.append(task_time)
+        predecessor_lists.append(predecessors)
+    counts = [len(predecessors) for predecessors in predecessor_lists]
+    return ids, names, times, [k for predecessors in predecessor_lists for k in predecessors], counts
+
+
+def _parse_chunk(rows):
+    # ids, names, times, the predecessor ids of all rows back to back and the predecessor count of every row,
+    # converted column by column. Raises ValueError on any bad field or negative time, the chunk then goes
+    # through _parse_rows
+    id_fields, names, time_fields, predecessor_fields = zip(*rows)
+    ids = list(map(int, id_fields))
+    times = list(map(int, time_fields))
+    if min(times) < 0:
+        raise ValueError("negative time")
+    counts = [field.count(';') + 1 if field and not field.isspace() else 0 for field in predecessor_fields]
+    joined = ';'.join([field for field, count in zip(predecessor_fields, counts) if count])
+    predecessors = list(map(int, joined.split(';'))) if joined else []
+    return ids, list(names), times, predecessors, counts
+
+
+def _first_occurrences(edge_tasks, edge_predecessors):
+    # mask of the edges that are not a repeat of an earlier edge of the same row, in O(e log e)
+    keep = np.ones(len(edge_tasks), dtype=bool)
+    if len(edge_tasks) > 1:
+        order = np.lexsort((edge_predecessors, edge_tasks))
+        repeated = ((edge_tasks[order][1:] == edge_tasks[order][:-1])
+                    & (edge_predecessors[order][1:] == edge_predecessors[order][:-1]))
+        keep[order[1:][repeated]] = False
+    return keep
+
+
+def read_task_table(csv_file, chunk_rows=CHUNK_ROWS, validate=True):
+    # Stream csv_file (ID,Name,Time,Predecessors with ';' between predecessor ids, one header line) into a
+    # TaskTable. Rows are collected chunk_rows at a time and converted column by column straight into arrays,
+    # only a chunk that holds a bad field is parsed row by row to report it. Rows that cannot be parsed are skipped
+    # and reported, with validate the table is then checked as well. Repeated predecessors of a row are dropped.
+    # A TaskFileError lists every error with its file line
+    id_chunks, time_chunks, line_chunks, edge_task_chunks, edge_predecessor_chunks = [], [], [], [], []
+    name_chunks, name_length_chunks = [], []
+    errors = []
+    rows = 0
+
+    def pack(chunk, lines):
+        nonlocal rows
+        if set(map(len, chunk)) != {4}:
+            chunk, lines = _regular_rows(chunk, lines, errors)
+        if not chunk:
+            return
+        try:
+            ids, names, times, predecessors, counts = _parse_chunk(chunk)
+        except ValueError:
+            reported = len(errors)
+            ids, names, times, predecessors, counts = _parse_rows(chunk, lines, errors)
+            bad_lines = {line for line, _ in errors[reported:]}
+            lines = [line for line in lines if line not in bad_lines]
+        encoded = [name.encode('utf-8') for name in names]
+        name_chunks.append(b''.join(encoded))
+        name_length_chunks.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+        id_chunks.append(np.array(ids, dtype=np.int64))
+        time_chunks.append(np.array(times, dtype=np.int64))
+        line_chunks.append(np.array(lines, dtype=np.int64))
+        edge_tasks = np.repeat(np.arange(rows, rows + len(ids), dtype=np.int64), counts)
+        edge_predecessors = np.array(predecessors, dtype=np.int64)
+        keep = _first_occurrences(edge_tasks, edge_predecessors)
+        edge_task_chunks.append(edge_tasks[keep])
+        edge_predecessor_chunks.append(edge_predecessors[keep])
+        rows += len(ids)
+
+    if csv.field_size_limit() < FIELD_SIZE_LIMIT:
+        csv.field_size_limit(FIELD_SIZE_LIMIT)
+    with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        try:
+            next(reader, None)
+            while True:
+                start = reader.line_num
+                chunk = list(islice(reader, chunk_rows))
+                if not chunk:
+                    break
+                if reader.line_num - start == len(chunk):
+                    lines = range(start + 1, reader.line_num + 1)
+                else:
+                    # a quoted field spans several lines, a row is numbered by the line it ends on
+                    spans = [1 + sum(field.count('\n') for field in row) for row in chunk]
+                    lines = list(accumulate(spans, initial=start))[1:]
+                pack(chunk, lines)
+        except csv.Error as error:
+            errors.append((reader.line_num, "unreadable row: {}".format(error)))
+
+    name_offsets = np.zeros(rows + 1, dtype=np.int64)
+    name_offsets[1:] = np.cumsum(np.concatenate(name_length_chunks or [np.zeros(0, dtype=np.int64)]))
+    empty = [np.zeros(0, dtype=np.int64)]
+    table = TaskTable(np.concatenate(id_chunks or empty), b''.join(name_chunks), name_offsets,
+                      np.concatenate(time_chunks or empty), np.concatenate(line_chunks or empty),
+                      np.concatenate(edge_task_chunks or empty), np.concatenate(edge_predecessor_chunks or empty))
+    if validate:
+        errors = sorted(errors + table.validate())
+    if errors:
+        raise TaskFileError(csv_file, errors)
+    return table
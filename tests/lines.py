@@ -0,0 +1,113 @@
+# Helpers shared by the tests: random lines and instances, brute force optima and the SALBP fixtures
+import csv
+import os
+import random
+
+from instance_generator import generate_tasks
+from line_assignment import LineAssignment
+from problem_instance import ProblemInstance
+from trade_transfer import TRADE, TRANSFER, execute_trade, execute_transfer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'salbp')
+
+
+class ExhaustiveMoveFinder:
+    # the candidate scan MoveFinder replaced: every valid transfer, then every valid trade between the heaviest and
+    # the lightest station, the smallest expected_g wins and the first one found on ties
+    def __init__(self, stations):
+        self.stations = stations
+
+    def touched(self, *js):
+        pass
+
+    def best_move(self):
+        stations = self.stations
+        loads = stations.loads
+        j_max = int(loads.argmax()) + 1
+        j_min = int(loads.argmin()) + 1
+        time_max, time_min = int(loads[j_max - 1]), int(loads[j_min - 1])
+        g = 0.5 * (time_max - time_min)
+        candidates = []
+        for task in stations[j_max - 1]:
+            if task.time < 2 * g and stations.can_move(task, j_min):
+                candidates.append((TRANSFER, 0.5 * ((time_max - task.time) - (time_min + task.time)),
+                                   task, j_max, j_min))
+        for task1 in stations[j_max - 1]:
+            for task2 in stations[j_min - 1]:
+                if task1.time < 2 * g and task2.time < 2 * g and stations.can_trade(task1, task2):
+                    g_trade = (time_max - task1.time + task2.time) - (time_min + task1.time - task2.time)
+                    candidates.append((TRADE, g_trade, task1, j_max, task2, j_min))
+        return min(candidates, key=lambda command: command[1]) if candidates else None
+
+
+def random_line(seed):
+    # a feasible but badly balanced line: tasks in topological order, each on a random station at or after its
+    # predecessors, so that trade and transfer has plenty of moves to make
+    rng = random.Random(seed)
+    instance = ProblemInstance(generate_tasks(rng.randint(10, 60), rng.uniform(0.1, 0.6),
+                                              diamond_share=rng.uniform(0, 0.2), seed=seed))
+    stations = LineAssignment(instance.graph)
+    for _ in range(rng.randint(2, 8)):
+        stations.append_station()
+    for i in instance.graph.topological_order().tolist():
+        task = instance.tasks[i]
+        stations.add(rng.randint(stations.lowest_station(task), len(stations)), task)
+    return stations
+
+
+def assignment(stations):
+    return [[task.id for task in station] for station in stations]
+
+
+def command_key(command):
+    # a command with its tasks as ids, comparable across finders
+    return tuple(part.id if hasattr(part, 'id') else part for part in command) if command is not None else None
+
+
+def execute(stations, finder, command):
+    # carry out command on stations and tell finder, like trade_and_transfer does
+    if command[0] == TRANSFER:
+        execute_transfer(stations, command)
+        finder.touched(command[3], command[4])
+    else:
+        execute_trade(stations, command)
+        finder.touched(command[3], command[5])
+
+
+def shortest_cycle_time(instance, station_count):
+    # brute force: the smallest longest station over every precedence feasible assignment of the tasks to
+    # station_count stations, tasks are placed in topological order on a station at or after their predecessors
+    graph = instance.graph
+    order = graph.topological_order().tolist()
+    times = graph.times.tolist()
+    station_of = [0] * graph.n
+    loads = [0] * station_count
+    best = [sum(times)]
+
+    def place(position):
+        if max(loads) >= best[0]:
+            return
+        if position == len(order):
+            best[0] = max(loads)
+            return
+        i = order[position]
+        for j in range(max([station_of[p] for p in graph.predecessors[i]], default=0), station_count):
+            station_of[i] = j
+            loads[j] += times[i]
+            place(position + 1)
+            loads[j] -= times[i]
+
+    place(0)
+    return best[0]
+
+
+def small_instance(seed):
+    # a random instance of at most 7 tasks, small enough for shortest_cycle_time
+    rng = random.Random(seed)
+    return ProblemInstance(generate_tasks(rng.randint(2, 7), rng.uniform(0, 0.7), time_range=(1, 12), seed=seed))
+
+
+def known_optima():
+    # (instance, cycle time, optimal station count) of fixtures/salbp/known_optima.csv
+    with open(os.path.join(FIXTURES, 'known_optima.csv'), newline='') as file:
+        return [(row['instance'], int(row['cycle_time']), int(row['stations'])) for row in csv.DictReader(file)]
@@ -0,0 +1,39 @@
+# Beat ranges and the sweep table
+import os
+
+import pytest
+
+from beat_sweep import beat_range, sweep_beats
+from lines import FIXTURES
+from mym_solver import MoodieYoungSolver
+from salbp_format import load_in2_instance
+
+
+@pytest.mark.parametrize('start, stop, step, beats', [
+    (50, 54, 1, [50, 51, 52, 53, 54]),
+    (50, 56, 3, [50, 53, 56]),
+    (56, 50, -3, [56, 53, 50]),
+    (54, 50, -1, [54, 53, 52, 51, 50]),
+    (54, 54, -1, [54]),
+    (54, 50, 1, []),
+])
+def test_range_includes_the_stop_in_both_directions(start, stop, step, beats):
+    assert beat_range(start, stop, step) == beats
+
+
+def test_zero_step_is_rejected():
+    with pytest.raises(ValueError):
+        beat_range(50, 54, 0)
+
+
+def test_sweep_metrics_match_the_single_line_ones():
+    instance = load_in2_instance(os.path.join(FIXTURES, 'TASKS35.IN2'))
+    rows = sweep_beats(instance, [5, 54, 60], workers=1)
+    assert rows[0] == {'beat': 5, 'stations': None, 'lower_bound': None, 'balance_rate': None,
+                       'smoothing_index': None}
+    solver = MoodieYoungSolver(instance)
+    for row in rows[1:]:
+        solution = solver.solve(row['beat'])
+        assert row['stations'] == solution.station_count
+        assert row['balance_rate'] == pytest.approx(solution.balance_rate)
+        assert row['smoothing_index'] == pytest.approx(solution.smoothing_index)
@@ -0,0 +1,23 @@
+# The exact SALBP-1 solver against the known optima of the fixture instances
+import os
+
+import pytest
+
+from branch_and_bound import solve_exact
+from lines import FIXTURES, known_optima
+from salbp_format import load_in2_instance
+
+
+@pytest.mark.parametrize('name, beat, optimum', known_optima())
+def test_solver_proves_the_known_optimum(name, beat, optimum):
+    instance = load_in2_instance(os.path.join(FIXTURES, name + '.IN2'))
+    result = solve_exact(instance, beat, time_limit=60)
+    assert result.optimal
+    assert result.station_count == result.lower_bound == optimum
+
+    stations = result.stations
+    assert stations.loads.max() <= beat
+    assert sorted(task.id for station in stations for task in station) == sorted(task.id for task in instance.tasks)
+    station_of = {task.id: stations.station_of(task) for task in instance.tasks}
+    assert all(station_of[predecessor] <= station_of[task.id]
+               for task in instance.tasks for predecessor in task.predecessors)
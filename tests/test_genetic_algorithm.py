@@ -0,0 +1,27 @@
+# The lockstep batch decoder of the genetic algorithm against the one-line decoder
+import numpy as np
+import pytest
+
+from assignment_engine import assign_elements
+from genetic_algorithm import BatchDecoder
+from instance_generator import generate_tasks
+from problem_instance import ProblemInstance
+
+SEEDS = range(30)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_batch_decoder_matches_assign_elements(seed):
+    rng = np.random.default_rng(seed)
+    instance = ProblemInstance(generate_tasks(int(rng.integers(5, 80)), float(rng.uniform(0, 0.8)),
+                                              diamond_share=float(rng.uniform(0, 0.2)), seed=seed))
+    beat = int(instance.graph.times.max()) + int(rng.integers(0, 60))
+    keys = rng.random((16, instance.graph.n))
+    keys[:4] = np.floor(keys[:4] * 4)  # ties, broken by task order
+    station_of, loads = BatchDecoder(instance, beat).decode(keys)
+    for row in range(len(keys)):
+        stations = assign_elements(instance.tasks, instance.graph, beat, keys[row].tolist())
+        expected = [stations.station_of(task) for task in instance.tasks]
+        assert station_of[row].tolist() == expected
+        assert loads[row, :len(stations)].tolist() == stations.loads.tolist()
+        assert not loads[row, len(stations):].any()
@@ -0,0 +1,53 @@
+# The compiled instance cache next to a task file
+import os
+
+import problem_instance
+from instance_cache import compiled_path
+from problem_instance import load_instance
+
+HEADER = "ID,Name,Time,Predecessors\n"
+
+
+def write(path, text):
+    path.write_text(HEADER + text, encoding='utf-8')
+    return str(path)
+
+
+def test_compiled_file_is_used_until_the_source_changes(tmp_path, monkeypatch):
+    csv_file = write(tmp_path / 'tasks.csv', "1,a,3,\n2,b,4,1\n3,c,5,1;2\n")
+    first = load_instance(csv_file, cache=True)
+    assert os.path.exists(compiled_path(csv_file))
+
+    parsed = []
+    read_task_table = problem_instance.read_task_table
+    monkeypatch.setattr(problem_instance, 'read_task_table', lambda path: parsed.append(path) or read_task_table(path))
+    second = load_instance(csv_file, cache=True)
+    assert parsed == []
+    assert [(task.id, task.name, task.time, task.predecessors, task.successors) for task in second.tasks] == \
+           [(task.id, task.name, task.time, task.predecessors, task.successors) for task in first.tasks]
+    assert second.weights.rpw.tolist() == first.weights.rpw.tolist() == [12, 9, 5]
+
+    write(tmp_path / 'tasks.csv', "1,a,3,\n2,b,4,1\n3,c,6,2\n")
+    changed = load_instance(csv_file, cache=True)
+    assert parsed == [csv_file]
+    assert changed.tasks[2].predecessors == [2]
+    assert changed.weights.rpw.tolist() == [13, 10, 6]
+
+
+def test_corrupt_compiled_file_is_rebuilt(tmp_path):
+    csv_file = write(tmp_path / 'tasks.csv', "1,a,3,\n2,b,4,1\n")
+    with open(compiled_path(csv_file), 'wb') as file:
+        file.write(b'PK\x03\x04 truncated')
+    assert [task.time for task in load_instance(csv_file, cache=True).tasks] == [3, 4]
+    assert [task.time for task in load_instance(csv_file, cache=True).tasks] == [3, 4]
+
+
+def test_compiled_file_gets_the_mode_of_a_new_file(tmp_path):
+    csv_file = write(tmp_path / 'tasks.csv', "1,a,3,\n")
+    umask = os.umask(0o022)
+    try:
+        load_instance(csv_file, cache=True)
+    finally:
+        os.umask(umask)
+    assert os.stat(compiled_path(csv_file)).st_mode & 0o777 == 0o644
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
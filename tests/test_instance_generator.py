@@ -0,0 +1,56 @@
+# Generated instances: one connected layered graph at the requested order strength
+import sys
+
+import pytest
+
+import instance_generator
+from instance_generator import generate_tasks, measure_order_strength
+from problem_instance import ProblemInstance
+
+
+def component_count(tasks):
+    parent = {task.id: task.id for task in tasks}
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for task in tasks:
+        for k in task.predecessors:
+            parent[find(k)] = find(task.id)
+    return len({find(task.id) for task in tasks})
+
+
+@pytest.mark.parametrize('order_strength', [0.05, 0.3, 0.6, 0.9])
+@pytest.mark.parametrize('diamond_share', [0.0, 0.1])
+def test_predicted_depth_meets_the_order_strength(order_strength, diamond_share):
+    tasks = generate_tasks(1000, order_strength, diamond_share=diamond_share, seed=4)
+    assert component_count(tasks) == 1
+    assert abs(measure_order_strength(ProblemInstance(tasks)) - order_strength) < 0.05
+
+
+@pytest.mark.parametrize('depth, order_strength', [(10, 0.2), (30, 0.5), (60, 0.9)])
+def test_chain_depth_is_fitted(depth, order_strength):
+    tasks = generate_tasks(600, order_strength, chain_depth=depth, seed=5)
+    instance = ProblemInstance(tasks)
+    assert component_count(tasks) == 1
+    assert abs(measure_order_strength(instance) - order_strength) <= instance_generator.ORDER_STRENGTH_TOLERANCE
+    # ids go level by level, so predecessors come first
+    longest = {}
+    for task in tasks:
+        longest[task.id] = 1 + max((longest[k] for k in task.predecessors), default=0)
+    assert max(longest.values()) == depth
+
+
+@pytest.mark.parametrize('depth, order_strength', [(5, 0.9), (100, 0.3)])
+def test_unreachable_order_strength_is_rejected(depth, order_strength):
+    with pytest.raises(ValueError):
+        generate_tasks(1000, order_strength, chain_depth=depth)
+
+
+def test_missing_output_directory_is_created(tmp_path, monkeypatch):
+    csv_file = tmp_path / 'data' / 'synthetic.csv'
+    monkeypatch.setattr(sys, 'argv', ['instance_generator.py', str(csv_file), '--tasks', '50'])
+    instance_generator.main()
+    assert csv_file.read_text(encoding='utf-8').startswith('ID,Name,Time,Predecessors')
@@ -0,0 +1,24 @@
+# The station lower bounds never exceed the optimal station count
+import os
+
+import pytest
+
+from lines import FIXTURES, known_optima, shortest_cycle_time, small_instance
+from lower_bounds import station_lower_bounds
+from salbp_format import load_in2_instance
+
+
+@pytest.mark.parametrize('name, beat, optimum', known_optima())
+def test_bounds_of_the_fixture_instances(name, beat, optimum):
+    bounds = station_lower_bounds(load_in2_instance(os.path.join(FIXTURES, name + '.IN2')), beat)
+    assert max(bounds.values()) == bounds['best'] <= optimum
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_bounds_against_brute_force(seed):
+    instance = small_instance(seed)
+    times = instance.graph.times
+    for beat in range(int(times.max()), int(times.sum()) + 1):
+        optimum = next(count for count in range(1, instance.graph.n + 1)
+                       if shortest_cycle_time(instance, count) <= beat)
+        assert station_lower_bounds(instance, beat)['best'] <= optimum
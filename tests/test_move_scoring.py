@@ -0,0 +1,75 @@
+# The vectorized move searches against MoveFinder and against plain candidate scans
+import pytest
+
+from lines import ExhaustiveMoveFinder, assignment, command_key, execute, random_line
+from move_scoring import AllPairsMoveFinder, PairMoveFinder
+from trade_transfer import TRADE, TRANSFER, MoveFinder
+
+SEEDS = range(30)
+
+
+def all_pairs_move(stations):
+    # every transfer and trade of the line ranked by the change of the sum of squared station times, the first
+    # in line order on ties and transfers before trades
+    loads = stations.loads.tolist()
+    line = [(j, task) for j in range(1, len(stations) + 1) for task in stations[j - 1]]
+    transfers, trades = [], []
+    for j1, task in line:
+        for j2 in range(1, len(stations) + 1):
+            change = 2 * task.time * (task.time - (loads[j1 - 1] - loads[j2 - 1]))
+            if j2 != j1 and change < 0 and stations.can_move(task, j2):
+                transfers.append((TRANSFER, float(change), task, j1, j2))
+    for j1, task1 in line:
+        for j2, task2 in line:
+            moved = task1.time - task2.time
+            difference = loads[j1 - 1] - loads[j2 - 1]
+            change = 2 * moved * (moved - difference)
+            if difference > 0 and change < 0 and stations.can_trade(task1, task2):
+                trades.append((TRADE, float(change), task1, j1, task2, j2))
+    transfer = min(transfers, key=lambda command: command[1], default=None)
+    trade = min(trades, key=lambda command: command[1], default=None)
+    if transfer is not None and (trade is None or transfer[1] <= trade[1]):
+        return transfer
+    return trade
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_pair_finder_selects_the_exhaustive_move(seed):
+    stations = random_line(seed)
+    reference, finder = ExhaustiveMoveFinder(stations), PairMoveFinder(stations)
+    for _ in range(200):
+        command = finder.best_move()
+        assert command_key(command) == command_key(reference.best_move())
+        if command is None:
+            break
+        execute(stations, finder, command)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_pair_finder_matches_move_finder(seed):
+    # PairMoveFinder and MoveFinder step identical copies of a line to identical assignments
+    stations = random_line(seed)
+    lines = [stations, stations.copy()]
+    finders = [MoveFinder(lines[0]), PairMoveFinder(lines[1])]
+    for _ in range(200):
+        commands = [finder.best_move() for finder in finders]
+        assert command_key(commands[0]) == command_key(commands[1])
+        if commands[0] is None:
+            break
+        for line, finder, command in zip(lines, finders, commands):
+            execute(line, finder, command)
+        assert assignment(lines[0]) == assignment(lines[1])
+
+
+@pytest.mark.parametrize('block_elements', [1, 1 << 22])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_all_pairs_finder_keeps_selecting_the_best_move_after_updates(seed, block_elements):
+    # the cached pair scores, updated move by move, must give the move a full scan of the line gives
+    stations = random_line(seed)
+    finder = AllPairsMoveFinder(stations, block_elements)
+    for _ in range(200):
+        command = finder.best_move()
+        assert command_key(command) == command_key(all_pairs_move(stations))
+        if command is None:
+            break
+        execute(stations, finder, command)
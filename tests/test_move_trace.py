@@ -0,0 +1,48 @@
+# Writing trade and transfer traces and replaying them into the assignments
+import pytest
+
+from lines import random_line
+from move_trace import CANDIDATES, LOADS, MOVES, MoveTrace, read_trace, replay
+from trade_transfer import trade_and_transfer
+
+
+def station_sets(stations):
+    return [sorted(task.id for task in station) for station in stations]
+
+
+@pytest.mark.parametrize('buffer_events', [1, 4096])
+@pytest.mark.parametrize('seed', range(10))
+def test_replay_of_a_written_trace_rebuilds_every_assignment(tmp_path, seed, buffer_events):
+    stations = random_line(seed)
+    start = station_sets(stations)
+    after_moves = []
+    trace_file = str(tmp_path / 'trace.jsonl')
+    with MoveTrace(trace_file, LOADS, buffer_events) as trace:
+        result = trade_and_transfer(stations, after_move=lambda line: after_moves.append(station_sets(line)),
+                                    trace=trace)
+
+    replayed = list(replay(read_trace(trace_file)))
+    events = [event['event'] for event, _ in replayed]
+    assert events[0] == 'start' and events[-1] == 'end'
+    assert events.count('move') == result.iterations
+    assert [sorted(station) for station in replayed[0][1]] == start
+    moves = [stations for event, stations in replayed if event['event'] == 'move']
+    assert [[sorted(station) for station in line] for line in moves] == after_moves
+    assert [sorted(station) for station in replayed[-1][1]] == station_sets(stations)
+    assert replayed[-1][0]['loads'] == stations.loads.tolist()
+
+
+def test_levels_and_callback_sink():
+    events = []
+    trade_and_transfer(random_line(1), trace=MoveTrace(events.append, MOVES))
+    assert 'loads' not in next(event for event in events if event['event'] == 'move')
+    events = []
+    trade_and_transfer(random_line(1), trace=MoveTrace(events.append, CANDIDATES))
+    assert any(event['event'] == 'candidate' for event in events)
+
+
+def test_replay_rejects_a_move_from_the_wrong_station():
+    events = [{'event': 'start', 'run': 1, 'stations': [[1], [2]], 'times': [[3], [4]]},
+              {'event': 'move', 'run': 1, 'step': 1, 'kind': 'transfer', 'moves': [[1, 2, 1]]}]
+    with pytest.raises(ValueError, match="moves task 1 from station 2"):
+        list(replay(events))
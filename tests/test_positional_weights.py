@@ -0,0 +1,31 @@
+# Positional weights against the dense closure matrix
+import random
+
+import numpy as np
+import pytest
+
+import positional_weights
+from positional_weights import PositionalWeights
+from precedence_graph import PrecedenceGraph
+from transitive_closure import TransitiveClosure
+
+
+def random_graph(rng, n):
+    predecessors = [[rng.randrange(i) + 1 for _ in range(rng.randint(0, 3))] if i else [] for i in range(n)]
+    rows = list(range(n))
+    rng.shuffle(rows)
+    return PrecedenceGraph([i + 1 for i in rows], [rng.randint(1, 20) for _ in rows], [predecessors[i] for i in rows])
+
+
+@pytest.mark.parametrize('sparse_block', [0, 32, 10 ** 9])
+@pytest.mark.parametrize('block_elements', [1, 64, 1 << 22])
+def test_weights_match_the_closure_matrix_products(monkeypatch, sparse_block, block_elements):
+    monkeypatch.setattr(positional_weights, 'SPARSE_BLOCK', sparse_block)
+    rng = random.Random(sparse_block + block_elements)
+    for _ in range(30):
+        graph = random_graph(rng, rng.randint(1, 150))
+        closure = TransitiveClosure(graph)
+        weights = PositionalWeights(closure, block_elements)
+        matrix = closure.matrix().astype(np.int64)
+        assert weights.rpw.tolist() == (matrix @ graph.times).tolist()
+        assert weights.head_time.tolist() == (graph.times @ matrix).tolist()
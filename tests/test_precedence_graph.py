@@ -0,0 +1,34 @@
+# Construction of the indexed precedence graph
+import pytest
+
+from precedence_graph import PrecedenceGraph
+
+
+def test_repeated_predecessors_are_listed_once_in_file_order():
+    graph = PrecedenceGraph([1, 2, 3, 4], [1, 1, 1, 1], [[], [], [2, 1, 2], [3, 1, 3, 1]])
+    assert graph.predecessors == [[], [], [1, 0], [2, 0]]
+    assert graph.successors == [[2, 3], [2], [3], []]
+    assert graph.edge_count == 4
+
+
+def test_wide_in_star_builds_every_edge_once():
+    n = 20000
+    graph = PrecedenceGraph(range(1, n + 2), [1] * (n + 1), [[] for _ in range(n)] + [list(range(1, n + 1)) * 2])
+    assert graph.in_degrees()[-1] == n
+    assert graph.topological_order()[-1] == n
+
+
+def test_unknown_predecessor_and_cycle_are_rejected():
+    with pytest.raises(ValueError, match="unknown predecessor 9"):
+        PrecedenceGraph([1, 2], [1, 1], [[], [9]])
+    with pytest.raises(ValueError, match="cycle"):
+        PrecedenceGraph([1, 2], [1, 1], [[2], [1]]).topological_order()
+
+
+def test_graph_from_csr_arrays_matches_the_constructor():
+    graph = PrecedenceGraph([5, 7, 9, 4], [1, 2, 3, 4], [[], [5], [7, 5], [5, 9]])
+    rebuilt = PrecedenceGraph.from_csr(graph.ids, graph.times, graph.pred_indptr, graph.pred_indices)
+    assert rebuilt.successors == graph.successors == [[1, 2, 3], [2], [3], []]
+    assert rebuilt.predecessors == graph.predecessors
+    assert rebuilt.succ_indptr.tolist() == graph.succ_indptr.tolist()
+    assert rebuilt.topological_order().tolist() == graph.topological_order().tolist()
@@ -0,0 +1,27 @@
+# The SALBP-2 beat search against brute force on small instances
+import pytest
+
+from lines import shortest_cycle_time, small_instance
+from salbp2 import minimum_beat
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_beat_is_bracketed_by_the_brute_force_optimum(seed):
+    # the heuristics cannot beat the optimum and the proven lower beat cannot exceed it
+    instance = small_instance(seed)
+    for station_count in range(1, instance.graph.n + 1):
+        result = minimum_beat(instance, station_count, seed=0)
+        optimum = shortest_cycle_time(instance, station_count)
+        assert result.lower_beat <= optimum <= result.cycle_time <= result.beat
+        assert len(result.solution.stations) <= station_count
+
+
+def test_one_station_holds_everything():
+    instance = small_instance(3)
+    result = minimum_beat(instance, 1)
+    assert result.beat == result.cycle_time == result.lower_beat == int(instance.graph.times.sum())
+
+
+def test_station_count_below_one_is_rejected():
+    with pytest.raises(ValueError, match="at least 1"):
+        minimum_beat(small_instance(0), 0)
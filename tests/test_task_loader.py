@@ -0,0 +1,63 @@
+# Reading and validating task files
+import pytest
+
+from problem_instance import load_instance
+from task_loader import TaskFileError, read_task_table
+
+HEADER = "ID,Name,Time,Predecessors\n"
+
+
+def write(tmp_path, text, name='tasks.csv'):
+    path = tmp_path / name
+    path.write_text(HEADER + text, encoding='utf-8')
+    return str(path)
+
+
+def errors_of(csv_file, **options):
+    with pytest.raises(TaskFileError) as raised:
+        read_task_table(csv_file, **options)
+    return raised.value.errors
+
+
+def test_columns_and_repeated_predecessors(tmp_path):
+    table = read_task_table(write(tmp_path, "1,a,3,\n2,b,4,1\n3,c,5,2;1;2;1\n4,d,0\n"))
+    assert table.ids.tolist() == [1, 2, 3, 4]
+    assert table.names() == ['a', 'b', 'c', 'd']
+    assert table.times.tolist() == [3, 4, 5, 0]
+    assert table.lines.tolist() == [2, 3, 4, 5]
+    assert table.predecessor_ids() == [[], [1], [2, 1], []]
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 1000])
+def test_every_error_is_reported_with_its_line(tmp_path, chunk_rows):
+    csv_file = write(tmp_path, "1,a,3,\n\n2,b,x,1\n3,c,-1,1\n4,d,2,9\n1,e,2,\n5,f,2,5\n6,g\n")
+    errors = errors_of(csv_file, chunk_rows=chunk_rows)
+    assert [line for line, _ in errors] == [4, 5, 6, 7, 8, 9]
+    messages = dict(errors)
+    assert "not an integer" in messages[4]
+    assert "negative time" in messages[5]
+    assert "unknown predecessor 9" in messages[6]
+    assert "first defined on line 2" in messages[7]
+    assert "own predecessor" in messages[8]
+    assert "expected 4 columns" in messages[9]
+
+
+def test_cycle_rows_are_reported(tmp_path):
+    errors = errors_of(write(tmp_path, "1,a,1,3\n2,b,1,1\n3,c,1,2\n4,d,1,1\n"))
+    assert errors == [(2, "task 1 is on a precedence cycle"), (3, "task 2 is on a precedence cycle"),
+                      (4, "task 3 is on a precedence cycle")]
+
+
+def test_row_after_a_multiline_quoted_name_keeps_its_line(tmp_path):
+    errors = errors_of(write(tmp_path, '1,"two\nlines",1,\n2,b,1,7\n'))
+    assert errors == [(4, "task 2 has unknown predecessor 7")]
+
+
+def test_predecessor_field_longer_than_the_csv_default(tmp_path):
+    n = 40000
+    rows = "".join("{},t,1,\n".format(i) for i in range(1, n + 1))
+    predecessors = ";".join(str(i) for i in range(1, n + 1))
+    csv_file = write(tmp_path, rows + "{},sink,1,{};{}\n".format(n + 1, predecessors, predecessors))
+    instance = load_instance(csv_file, cache=False)
+    assert len(instance.tasks[-1].predecessors) == n
+    assert instance.tasks[0].successors == [n + 1]
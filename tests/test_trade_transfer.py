@@ -0,0 +1,33 @@
+# MoveFinder against the candidate scan it replaced, and the trade and transfer loop that uses it
+import pytest
+
+from lines import ExhaustiveMoveFinder, command_key, execute, random_line
+from trade_transfer import MoveFinder, smoothing_index, trade_and_transfer
+
+SEEDS = range(30)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_finder_selects_the_exhaustive_move(seed):
+    # step the same line with both searches, every step must select the same command
+    stations = random_line(seed)
+    reference, finder = ExhaustiveMoveFinder(stations), MoveFinder(stations)
+    for _ in range(200):
+        expected = reference.best_move()
+        command = finder.best_move()
+        assert command_key(command) == command_key(expected)
+        if command is None:
+            break
+        execute(stations, finder, command)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_trade_and_transfer_ends_on_the_best_feasible_line_it_saw(seed):
+    stations = random_line(seed)
+    tasks = [task for station in stations for task in station]
+    seen = [smoothing_index(stations.loads)]
+    result = trade_and_transfer(stations, after_move=lambda line: seen.append(smoothing_index(line.loads)))
+    assert result.smoothing_index == min(seen) == smoothing_index(stations.loads)
+    assert sorted(task.id for station in stations for task in station) == sorted(task.id for task in tasks)
+    station_of = {task.id: stations.station_of(task) for task in tasks}
+    assert all(station_of[predecessor] <= station_of[task.id] for task in tasks for predecessor in task.predecessors)
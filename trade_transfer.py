@@ -0,0 +1,259 @@
+# Trade and transfer stage of the Moodie Young Method
+import heapq
+import time
+
+import numpy as np
+
+import profiling
+from move_trace import CANDIDATES, MOVES, MoveTrace, print_moves
+
+TRANSFER = 1
+TRADE = 2
+
+# reasons for the trade and transfer loop to stop
+CONVERGED = 'converged'
+CYCLE = 'cycle'
+ITERATION_LIMIT = 'iteration_limit'
+TIME_LIMIT = 'time_limit'
+NO_IMPROVEMENT = 'no_improvement'
+
+
+def check_task_redeploy_validity(stations, j, object_task):
+    # for stations that have been allocated, if the task object_task is changed to station j, determine whether its immediately preceding tasks are at or before station j
+    # and its assigned immediately following tasks are at station j or after
+    if profiling.active is not None:
+        profiling.active.count('redeploy_checks')
+    return stations.can_move(object_task, j)
+
+
+def command_moves(command):
+    # the kind of a command and its task moves as [task id, from station, to station] lists, as traced
+    if command[0] == TRANSFER:
+        return 'transfer', [[command[2].id, command[3], command[4]]]
+    return 'trade', [[command[2].id, command[3], command[5]], [command[4].id, command[5], command[3]]]
+
+
+class MoveFinder:
+    # Finds the move the exhaustive candidate scan would select, without building the candidate set.
+    # A transfer of task t from j_max to j_min scores expected_g = 0.5 * (time_max - time_min) - t and a trade of
+    # t1 (on j_max) against t2 (on j_min) scores expected_g = (time_max - time_min) - 2 * (t1 - t2). The smallest
+    # expected_g wins, on ties the transfer, then the task (pair) listed first on its station.
+    # Every station keeps its tasks sorted by time, rebuilt only for the two stations a move touches, so the best
+    # transfer is the first valid task of the descending list and the best trade comes out of a heap that yields
+    # pairs by decreasing t1 - t2. Validity is checked only until the best candidate is found
+    def __init__(self, stations):
+        self.stations = stations
+        self._sorted = {}
+        self.profile = profiling.active
+        # MoveTrace of the candidates, set by trade_and_transfer when its trace records them
+        self.trace = None
+
+    def touched(self, *js):
+        # forget the sorted task lists of the stations a move has changed
+        for j in js:
+            self._sorted.pop(j, None)
+
+    def sorted_tasks(self, j):
+        # (time, position, task) of every task on station j, longest task first, then by position
+        if j not in self._sorted:
+            self._sorted[j] = sorted(((task.time, position, task) for position, task in enumerate(self.stations[j - 1])),
+                                     key=lambda item: (-item[0], item[1]))
+        return self._sorted[j]
+
+    def best_transfer(self, j_max, j_min, limit):
+        # (expected_g, task) of the best transfer from j_max to j_min, tasks must be shorter than limit
+        for time, _, task in self.sorted_tasks(j_max):
+            if self.profile is not None:
+                self.profile.count('transfer_candidates')
+            if time < limit and check_task_redeploy_validity(self.stations, j_min, task):
+                return 0.5 * limit - time, task
+        return None
+
+    def best_trade(self, j_max, j_min, limit):
+        # (expected_g, task1, task2) of the best trade between j_max and j_min, both tasks shorter than limit
+        tasks1 = [item for item in self.sorted_tasks(j_max) if item[0] < limit]
+        tasks2 = sorted((item for item in self.sorted_tasks(j_min) if item[0] < limit),
+                        key=lambda item: (item[0], item[1]))
+        if not tasks1 or not tasks2:
+            return None
+        heap = [(tasks2[0][0] - tasks1[0][0], 0, 0)]
+        queued = {(0, 0)}
+        best = None
+        while heap:
+            negative_difference, a, b = heapq.heappop(heap)
+            if best is not None and negative_difference > best[0]:
+                break
+            (time1, position1, task1), (time2, position2, task2) = tasks1[a], tasks2[b]
+            if self.profile is not None:
+                self.profile.count('trade_candidates')
+            if ((best is None or (position1, position2) < best[1])
+                    and self._can_trade(task1, task2)):
+                best = (negative_difference, (position1, position2), task1, task2)
+            for next_a, next_b in ((a + 1, b), (a, b + 1)):
+                if next_a < len(tasks1) and next_b < len(tasks2) and (next_a, next_b) not in queued:
+                    queued.add((next_a, next_b))
+                    heapq.heappush(heap, (tasks2[next_b][0] - tasks1[next_a][0], next_a, next_b))
+        if best is None:
+            return None
+        return limit + 2 * best[0], best[2], best[3]
+
+    def _can_trade(self, task1, task2):
+        if self.profile is not None:
+            self.profile.count('redeploy_checks', 2)
+        return self.stations.can_trade(task1, task2)
+
+    def _trace_candidate(self, command):
+        kind, moves = command_moves(command)
+        self.trace.candidate(kind, command[1], moves)
+
+    def best_move(self):
+        # the selected command as (TRANSFER, expected_g, task, j_max, j_min) or
+        # (TRADE, expected_g, task1, j_max, task2, j_min), None when there is no candidate
+        stations_time = self.stations.loads
+        j_max = int(stations_time.argmax()) + 1
+        j_min = int(stations_time.argmin()) + 1
+        limit = int(stations_time[j_max - 1] - stations_time[j_min - 1])
+        transfer = self.best_transfer(j_max, j_min, limit)
+        trade = self.best_trade(j_max, j_min, limit)
+        if self.trace is not None:
+            if transfer is not None:
+                self._trace_candidate((TRANSFER, transfer[0], transfer[1], j_max, j_min))
+            if trade is not None:
+                self._trace_candidate((TRADE, trade[0], trade[1], j_max, trade[2], j_min))
+        if transfer is not None and (trade is None or transfer[0] <= trade[0]):
+            return TRANSFER, transfer[0], transfer[1], j_max, j_min
+        if trade is not None:
+            return TRADE, trade[0], trade[1], j_max, trade[2], j_min
+        return None
+
+
+def execute_transfer(original_stations, command_transfer):
+    original_stations.transfer(command_transfer[2], command_transfer[3], command_transfer[4])
+
+
+def execute_trade(original_stations, command_trade):
+    original_stations.trade(command_trade[2], command_trade[3], command_trade[4], command_trade[5])
+
+
+def undo_command(original_stations, command):
+    # put the tasks of an executed command back on their former stations. An after_move callback may have dropped
+    # a trailing station the command emptied, it is restored first
+    while len(original_stations) < max(command[3], command[-1]):
+        original_stations.append_station()
+    if command[0] == TRANSFER:
+        original_stations.transfer(command[2], command[4], command[3])
+    else:
+        original_stations.trade(command[2], command[5], command[4], command[3])
+
+
+def smoothing_index(stations_time):
+    return float(np.sqrt(np.sum(np.square(stations_time - stations_time.max()))))
+
+
+class TradeTransferLimits:
+    def __init__(self, max_iterations=None, time_limit=None, no_improvement_limit=None):
+        # max_iterations moves, time_limit seconds, no_improvement_limit moves in a row without a lower SI.
+        # None leaves the loop unlimited in that respect, cycles are always detected
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.no_improvement_limit = no_improvement_limit
+
+
+class TradeTransferResult:
+    def __init__(self, stations, reason, iterations, smoothing_index):
+        # stations holds the best assignment seen, reason tells why the loop stopped
+        self.stations = stations
+        self.reason = reason
+        self.iterations = iterations
+        self.smoothing_index = smoothing_index
+
+
+class StateHash:
+    # Zobrist style hash of the task -> station assignment, updated in O(1) per moved task
+    def __init__(self, stations):
+        self.index = stations.graph.index
+        self.value = 0
+        for j, station in enumerate(stations, 1):
+            for task in station:
+                self.value ^= hash((self.index[task.id], j))
+
+    def move(self, task, j_from, j_to):
+        i = self.index[task.id]
+        self.value ^= hash((i, j_from)) ^ hash((i, j_to))
+
+    def apply(self, command):
+        if command[0] == TRANSFER:
+            self.move(command[2], command[3], command[4])
+        else:
+            self.move(command[2], command[3], command[5])
+            self.move(command[4], command[5], command[3])
+
+
+@profiling.timed('trade_transfer')
+def trade_and_transfer(stations, verbose=False, after_move=None, limits=None, finder=None, trace=None):
+    # Repeatedly move work between the heaviest station j_max and the lightest station j_min until no transfer or
+    # trade is left. finder is the class that selects the moves, MoveFinder by default (see move_scoring.py for
+    # the vectorized ones). trace (a MoveTrace) records the run as events, with verbose and no trace every
+    # executed move is printed. after_move(stations) is called after each move.
+    # The loop also stops when it returns to an assignment it has already visited, or on one of the limits.
+    # Moves made after the lowest smoothing index was seen are undone, so stations ends on the best assignment
+    limits = limits or TradeTransferLimits()
+    deadline = None if limits.time_limit is None else time.perf_counter() + limits.time_limit
+    finder = (finder or MoveFinder)(stations)
+    if trace is None and verbose:
+        trace = MoveTrace(print_moves, MOVES)
+    if trace is not None:
+        trace.start(stations)
+        if trace.level >= CANDIDATES:
+            finder.trace = trace
+    state = StateHash(stations)
+    visited = {state.value}
+    best_index = smoothing_index(stations.loads)
+    since_best = []
+    iterations = 0
+    while True:
+        if limits.max_iterations is not None and iterations >= limits.max_iterations:
+            reason = ITERATION_LIMIT
+            break
+        if deadline is not None and time.perf_counter() > deadline:
+            reason = TIME_LIMIT
+            break
+        command = finder.best_move()
+        if command is None:
+            reason = CONVERGED
+            break
+        if command[0] == TRANSFER:
+            execute_transfer(stations, command)
+            finder.touched(command[3], command[4])
+        else:
+            execute_trade(stations, command)
+            finder.touched(command[3], command[5])
+        if trace is not None:
+            trace.move(*command_moves(command), stations.loads)
+        iterations += 1
+        since_best.append(command)
+        if after_move is not None:
+            after_move(stations)
+
+        current_index = smoothing_index(stations.loads)
+        if current_index < best_index:
+            best_index = current_index
+            since_best = []
+        state.apply(command)
+        if state.value in visited:
+            reason = CYCLE
+            break
+        visited.add(state.value)
+        if limits.no_improvement_limit is not None and len(since_best) >= limits.no_improvement_limit:
+            reason = NO_IMPROVEMENT
+            break
+
+    for command in reversed(since_best):
+        undo_command(stations, command)
+        if trace is not None:
+            trace.undo(*command_moves(command), stations.loads)
+    if trace is not None:
+        trace.end(reason, iterations, best_index, stations.loads)
+    if profiling.active is not None:
+        profiling.active.count('trade_transfer_iterations', iterations)
+    return TradeTransferResult(stations, reason, iterations, best_index)
@@ -0,0 +1,103 @@
+# Transitive closure of the precedence graph, stored as one integer bitset per task
+import numpy as np
+
+
+def bit_positions(bits):
+    # positions of the set bits of a non-negative integer, ascending
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder='little'))
+
+
+class TransitiveClosure:
+    def __init__(self, graph):
+        # Bits are numbered by topological position relative to the task itself: bit 0 is the task, bit d is the
+        # task d places later in the topological order. Every descendant comes later, so no bit is ever negative
+        # and each bitset is only as long as the distance to the task's last descendant.
+        # The sets are filled once in reverse topological order, each descendant is stored exactly once
+        self.graph = graph
+        self.order = graph.topological_order()
+        self.position = np.empty(graph.n, dtype=np.int64)
+        self.position[self.order] = np.arange(graph.n)
+        position = self.position.tolist()
+        self.reach = [0] * graph.n
+        for i in reversed(self.order.tolist()):
+            bits = 1
+            for k in graph.successors[i]:
+                bits |= self.reach[k] << (position[k] - position[i])
+            self.reach[i] = bits
+        self._counts = None
+
+    def is_descendant(self, i, k):
+        # True if task k is a (transitive) successor of task i, both given as task indices
+        distance = int(self.position[k] - self.position[i])
+        return distance > 0 and (self.reach[i] >> distance) & 1 == 1
+
+    def descendants_of(self, i):
+        # task indices of every descendant of task i (excluding i), in topological order
+        offsets = bit_positions(self.reach[i] >> 1) + 1
+        return self.order[self.position[i] + offsets]
+
+    def chain_of(self, i):
+        # task indices of task i followed by all of its descendants, in topological order
+        return self.order[self.position[i] + bit_positions(self.reach[i])]
+
+    def count(self, i):
+        # number of descendants of task i (excluding i)
+        return self.counts()[i]
+
+    def counts(self):
+        # number of descendants of every task, as an array indexed by task index
+        if self._counts is None:
+            self._counts = np.array([bits.bit_count() - 1 for bits in self.reach], dtype=np.int64)
+        return self._counts
+
+    def chain_successor_ids(self, i):
+        # ids of task i and all of its descendants, i.e. the chain successors used by RPW and MYM
+        ids = self.graph.ids
+        return [ids[k] for k in self.chain_of(i).tolist()]
+
+    def reach_ends(self):
+        # one past the topological position of the last descendant of the task at every topological position
+        return np.arange(self.graph.n) + np.array([self.reach[i].bit_length() for i in self.order.tolist()],
+                                                  dtype=np.int64)
+
+    def position_rows(self, start, stop, width=None):
+        # reflexive closure rows for topological positions start..stop-1 as a dense 0/1 uint8 matrix whose columns
+        # are the topological positions start..start+width-1 (up to the end of the graph by default). No row has a
+        # bit left of its own position, so a width reaching the last descendant of the rows holds all of their bits.
+        # Rows are laid out straight from the bitsets, without index lookups
+        width = self.graph.n - start if width is None else width
+        size = (width + 7) // 8
+        raw = b''.join((self.reach[i] << r).to_bytes(size, 'little')
+                       for r, i in enumerate(self.order[start:stop].tolist()))
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(stop - start, size)
+        return np.unpackbits(packed, axis=1, count=width, bitorder='little')
+
+    def position_pairs(self, start, stop):
+        # the same bits as position_rows(start, stop) as (row, column) arrays, one pair per set bit, rows and
+        # columns relative to start. The bitsets are scanned in 64 bit words and only the nonzero words are
+        # unpacked, for sparse rows
+        blobs = [bits.to_bytes((bits.bit_length() + 63) // 64 * 8, 'little')
+                 for bits in (self.reach[i] for i in self.order[start:stop].tolist())]
+        row_words = np.array([len(blob) // 8 for blob in blobs], dtype=np.int64)
+        row_starts = np.cumsum(row_words) - row_words
+        words = np.frombuffer(b''.join(blobs), dtype='<u8')
+        nonzero = np.flatnonzero(words)
+        bits = np.unpackbits(words[nonzero].view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        word_index, bit_index = np.nonzero(bits)
+        rows = np.searchsorted(row_starts, nonzero, side='right')[word_index] - 1
+        columns = 64 * (nonzero[word_index] - row_starts[rows]) + bit_index + rows
+        return rows, columns
+
+    def row_block(self, start, stop, reflexive=True):
+        # dense bool rows of the closure matrix for task indices start..stop-1, M[r, k] is True if k descends
+        # from task start + r (or k is that task when reflexive). Used to process large graphs in chunks
+        block = np.zeros((stop - start, self.graph.n), dtype=bool)
+        for r, i in enumerate(range(start, stop)):
+            bits = self.reach[i] if reflexive else self.reach[i] >> 1 << 1
+            block[r, self.order[self.position[i] + bit_positions(bits)]] = True
+        return block
+
+    def matrix(self, reflexive=True):
+        # the full dense n x n closure matrix, only meant for small and medium instances
+        return self.row_block(0, self.graph.n, reflexive)